@@ -1,6 +1,15 @@
+from dataclasses import dataclass
+import math
+import os
 import random
-import matplotlib.pyplot as plt
 import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+from checkpoint import load_checkpoint, remove_checkpoint, run_key, save_checkpoint
+from martingale_rules import WIN_PROBABILITY, MartingaleRules
+from martingale_plots import FanChart, PlotSelection, is_selected, render_sessions
+from trajectories import TrajectoryStore, TrajectoryWriter, concat_ragged, select_ragged
 
 
 '''
@@ -22,142 +31,385 @@ So this got me thinking. Martingale sucks, but how good is real card counting?
 I will implement a blackjack simulator to find out.
 '''
 
-# The goal of martingale is to double your money.
-# The rules are as follows:
-# 1. Bet 1 unit
-# 2. If you win, great!
-# 3. If you didn't win, double your bet and repeat until you hit your goal of doubling your initial unit.
+# The session itself (CASH_AVAILABLE, UNIT, MAX_BET, GOAL and WIN_PROBABILITY) is set in martingale_rules.py.
 #
-CASH_AVAILABLE  = 50_000
-UNIT            = 100
-MAX_BET         = CASH_AVAILABLE # Realistically at a casino this is much lower, like 500 a bet or something
-GOAL            = UNIT
-WIN_PROBABILITY = 0.5 # Blackjack has a realistic probability of 0.4222
 NUM_SIMULATIONS = 1000
+ANALYTIC        = False # Solve the session exactly instead of simulating it
+VECTORIZED      = True  # Run every session at once as arrays. The loop engine is kept for plotting each session.
+PLOT_SELECTION  = PlotSelection.NONE # Which sessions to plot. Plotting runs the loop engine, unless TRAJECTORY_PATH saves every session's cash.
+PLOT_EVERY      = 100   # With PlotSelection.SAMPLED, plot every Nth session
+PLOTS_DIR       = 'Plots'
+FAN_CHART       = False # Save one aggregate chart of every session to PLOTS_DIR, with the vectorized engine
+TRAJECTORY_PATH = None  # e.g. 'Trajectories/run' to save every session's cash from the vectorized engine, see trajectories.py
+CHECKPOINT_PATH = None  # e.g. 'martingale.ckpt' to save progress after every batch, and pick up from it if the run is started again
+NUM_WORKERS     = os.cpu_count() or 1 # Processes to render plots across
+SEED            = None  # Set for reproducible runs
 
-print(f'You are bringing ${CASH_AVAILABLE} to the casino.')
-print(f'Your base bet is ${UNIT}')
-print(f'Your goal winnings are ${GOAL}')
+# The vectorized engine plays sessions in batches of BATCH_SIZE and draws up to BLOCK_DRAWS
+# flips at a time, as many bets ahead as fit for the sessions still running.
+#
+BATCH_SIZE      = 1 << 20
+BLOCK_DRAWS     = 1 << 22
+MAX_BLOCK_BETS  = 1024
 
-# CASH_AVAILABLE  = int(input('How much money are you bringing to the casino? $'))
-# UNIT            = int(input('What is your base bet? $'))
-# GOAL            = int(input('What do you want to walk home with? $'))
 
-def flip_coin() -> bool:
+class MartingaleResults:
     '''
-    Returns True if heads, returns false, otherwise. 
-    Based off of your win probability.
+    Summary of a number of martingale sessions. Results from separate batches can be merged.
     '''
-    return random.uniform(0, 1) < WIN_PROBABILITY
+    def __init__(self) -> None:
+        self.num_simulations        = 0
+        self.num_wins               = 0
+        self.total_bets             = 0 # Counted as in the original loop, one more than the bets placed per session
+        self.total_staked           = 0
+        self.max_amount_in_the_hole = 0
+        self.max_bet                = 0
 
-def average_amount_staked(stakes) -> float:
-    '''
-    Given a list of amounts staked for a number of simulations. Return the average.
-    '''
-    average_amount_staked = 0
-    for stake in stakes: average_amount_staked += stake
-    average_amount_staked = average_amount_staked / len(stakes)
-    return round(average_amount_staked, 2)
+    def merge(self, other : 'MartingaleResults') -> None:
+        self.num_simulations        += other.num_simulations
+        self.num_wins               += other.num_wins
+        self.total_bets             += other.total_bets
+        self.total_staked           += other.total_staked
+        self.max_amount_in_the_hole  = max(self.max_amount_in_the_hole, other.max_amount_in_the_hole)
+        self.max_bet                 = max(self.max_bet, other.max_bet)
 
-def average_number_of_bets(counts) -> int:
-    '''
-    Given a list of number of stakes for a number of simulations. Return the average.
-    '''
-    average_number_of_bets = 0
-    for count in counts: average_number_of_bets += count
-    average_number_of_bets = average_number_of_bets / len(counts)
-    return int(average_number_of_bets)
+    def win_percentage(self) -> float:
+        return round((self.num_wins / self.num_simulations) * 100, 2)
 
-def num_wins(results) -> int:
-    '''
-    Given a list of boolean results. Return the number that are true.
-    '''
-    num_wins = 0
-    for result in results:
-        if result:
-            num_wins += 1
-    return num_wins
+    def average_number_of_bets(self) -> int:
+        return int(self.total_bets / self.num_simulations)
+
+    def average_amount_staked(self) -> float:
+        return round(self.total_staked / self.num_simulations, 2)
+
+    def print_summary(self, rules : MartingaleRules) -> None:
+        '''
+        Output the notable results of all your simulations.
+        Given the win percentage, did you break even?
+        '''
+        number_of_losses = self.num_simulations - self.num_wins
+        amount_won       = self.num_wins * rules.goal
+        amount_lost      = number_of_losses * rules.cash_available
+
+        print(f'The percentage of the time you won: %{self.win_percentage()}')
+        print(f'The average number of bets: {self.average_number_of_bets()}')
+        print(f'The average amount staked is: ${self.average_amount_staked()}')
+        print(f'The maximum amount you were in the hole: ${self.max_amount_in_the_hole}')
+        print(f'Your max bet was: ${self.max_bet}')
+        print(f'The total amount you won: ${amount_won}')
+        print(f'The total amount you lost: ${amount_lost}')
+        print(f'The total profit: ${amount_won - amount_lost}')
+
+
+@dataclass(frozen=True)
+class MartingaleSolution:
+    ''' The exact expectations for one session, from solve_session. '''
+    ruin_probability: float
+    expected_bets:    float # Bets actually placed, without the extra count the simulators add
+    expected_staked:  float
+    expected_profit:  float
+
+    def print_summary(self, rules : MartingaleRules) -> None:
+        print(f'The percentage of the time you win: %{round((1 - self.ruin_probability) * 100, 4)}')
+        print(f'The chance of going broke: 1 in {round(1 / self.ruin_probability) if self.ruin_probability else math.inf}')
+        print(f'The expected number of bets: {round(self.expected_bets, 4)}')
+        print(f'The expected amount staked is: ${round(self.expected_staked, 2)}')
+        print(f'The expected profit per session: ${round(self.expected_profit, 2)}')
 
-def win_percentage(results) -> float:
+
+def flip_coin(win_probability : float = WIN_PROBABILITY) -> bool:
     '''
-    Given a list of boolean results. Return the percentage that are true.
+    Returns True if heads, returns false, otherwise.
+    Based off of your win probability.
     '''
-    return round((num_wins(results) / len(results)) * 100, 2)
+    return random.uniform(0, 1) < win_probability
 
-# Run a thousand simulations
-print(f'\nRunning {NUM_SIMULATIONS} simulations ... \n')
 
-stakes  = []
-counts  = []
-results = []
-max_amount_in_the_hole = 0
-max_bet                = 0
-
-for _ in range(NUM_SIMULATIONS):
+def simulate_session(rules : MartingaleRules, results : MartingaleResults) -> list:
+    '''
+    Plays one session a bet at a time, adds it to results and returns the cash available before every bet and at the end.
+    '''
     cash                   = []
-    current_cash_available = CASH_AVAILABLE
-    current_bet            = UNIT
+    current_cash_available = rules.cash_available
+    current_bet            = rules.unit
     current_money          = 0
     count                  = 0
     total_amount_staked    = 0
+    max_amount_in_the_hole = 0
+    max_bet                = 0
 
-    while current_money < GOAL and current_cash_available > 0:
+    while current_money < rules.goal and current_cash_available > 0:
         cash.append(current_cash_available)
         count                  += 1
         total_amount_staked    += current_bet
-        max_amount_in_the_hole  = max(max_amount_in_the_hole, CASH_AVAILABLE - current_cash_available)
+        max_amount_in_the_hole  = max(max_amount_in_the_hole, rules.cash_available - current_cash_available)
         max_bet                 = max(max_bet, current_bet)
 
-        if flip_coin():
+        if flip_coin(rules.win_probability):
             current_cash_available += current_bet
             current_money          += current_bet
-            current_bet             = UNIT
+            current_bet             = rules.unit
         else:
             current_cash_available -= current_bet
             current_money          -= current_bet
             current_bet            *= 2
-            if current_bet > MAX_BET: current_bet = MAX_BET
+            if current_bet > rules.max_bet: current_bet = rules.max_bet
 
     count += 1
     cash.append(current_cash_available)
-    results.append(current_money >= GOAL)
-    stakes.append(total_amount_staked)
-    counts.append(count)
-
-    # Find average value of cash for plotting notes:
-    min_cash = 999999999999
-    max_cash = 0
-    for c in cash:
-        min_cash = min(min_cash, c)
-        max_cash = max(max_cash, c)
-
-    # Save the plots of each simulation to the Plots folder
-    x_axis_baseline = np.array([1, count + 1])
-    y_axis_baseline = np.array([CASH_AVAILABLE, CASH_AVAILABLE])
-    plt.plot(x_axis_baseline, y_axis_baseline, color='red')
-    x_axis = np.array([i for i in range(1, count + 1)])
-    y_axis = np.array(cash)
-    plt.plot(x_axis, y_axis, color='blue')
-    plt.xlabel('Bet #')
-    plt.ylabel('Cash Available')
-    plt.title(f'Martingale Simulation #{_ + 1}')
-    plt.text(1, ((max_cash - min_cash) * 0.8) + min_cash, f'Cash Available: ${CASH_AVAILABLE}\nGoal Winnings: ${GOAL}\nInitial Bet:         ${UNIT}', fontsize=8)
-    plt.savefig(f'Plots\\Simulation{_ + 1}')
-    plt.cla()
-    plt.clf()
-
-# Given the win percentage, did you break even?
-number_of_wins   = num_wins(results)
-number_of_losses = NUM_SIMULATIONS - number_of_wins
-amount_won       = number_of_wins * GOAL
-amount_lost      = number_of_losses * CASH_AVAILABLE
-
-# Output the notable results of all your simulations
-print(f'The percentage of the time you won: %{win_percentage(results)}')
-print(f'The average number of bets: {average_number_of_bets(counts)}')
-print(f'The average amount staked is: ${average_amount_staked(stakes)}')
-print(f'The maximum amount you were in the hole: ${max_amount_in_the_hole}')
-print(f'Your max bet was: ${max_bet}')
-print(f'The total amount you won: ${amount_won}')
-print(f'The total amount you lost: ${amount_lost}')
-print(f'The total profit: ${amount_won - amount_lost}')
\ No newline at end of file
+
+    session                        = MartingaleResults()
+    session.num_simulations        = 1
+    session.num_wins               = int(current_money >= rules.goal)
+    session.total_bets             = count
+    session.total_staked           = total_amount_staked
+    session.max_amount_in_the_hole = max_amount_in_the_hole
+    session.max_bet                = max_bet
+    results.merge(session)
+    return cash
+
+
+def simulate_sessions(num_simulations : int,
+                      rules           : MartingaleRules = MartingaleRules(),
+                      seed            = None,
+                      batch_size      : int = BATCH_SIZE,
+                      chart           : FanChart = None,
+                      writer          : TrajectoryWriter = None,
+                      checkpoint_path : str = None) -> MartingaleResults:
+    '''
+    Plays num_simulations sessions at once as arrays, batch_size sessions at a time.
+    Follows simulate_session bet for bet, so the summary matches the loop engine's statistically.
+    Every session's cash is also streamed into chart, if given, and its cash before every
+    bet and at the end (what simulate_session returns) is appended to writer, if given,
+    in the order the sessions finish, along with its session number (counting from 1 in the order they start).
+    With checkpoint_path, the generator, results, chart and writer position are saved after every batch,
+    and a run started again with the same arguments carries on from the last batch saved, finishing
+    exactly as an uninterrupted run would. A checkpoint saved with other arguments raises ValueError
+    instead of being resumed. The checkpoint is removed once the run is done.
+    '''
+    rng     = np.random.default_rng(seed)
+    results = MartingaleResults()
+    done    = 0
+    key     = run_key(num_simulations, rules, seed, batch_size,
+                      None if chart is None else chart.playing.shape,
+                      None if writer is None else (writer.path, writer.dtype))
+    state   = load_checkpoint(checkpoint_path, key) if checkpoint_path is not None else None
+    if state is not None:
+        done                    = state['done']
+        results                 = state['results']
+        rng.bit_generator.state = state['rng']
+        if chart is not None:
+            chart.__dict__.update(state['chart'].__dict__)
+        if writer is not None:
+            writer.seek(state['writer'])
+
+    for start in range(done, num_simulations, batch_size):
+        results.merge(_simulate_batch(min(batch_size, num_simulations - start), rules, rng, chart, writer, start + 1))
+        if checkpoint_path is not None:
+            save_checkpoint(checkpoint_path, key, {
+                'done'    : min(start + batch_size, num_simulations),
+                'results' : results,
+                'rng'     : rng.bit_generator.state,
+                'chart'   : chart,
+                'writer'  : writer.position() if writer is not None else None,
+            })
+
+    if checkpoint_path is not None:
+        remove_checkpoint(checkpoint_path)
+    return results
+
+
+def _simulate_batch(num_sessions : int,
+                    rules        : MartingaleRules,
+                    rng          : np.random.Generator,
+                    chart        : FanChart = None,
+                    writer       : TrajectoryWriter = None,
+                    first_number : int = 1) -> MartingaleResults:
+    '''
+    Every session in the batch bets in lockstep, numbered from first_number. Flips are drawn a block of bets at a time, sessions that
+    finish part way through a block are masked out, and finished sessions are dropped between blocks.
+    Trajectories of the sessions still playing are carried between blocks as a ragged array.
+    '''
+    results                 = MartingaleResults()
+    results.num_simulations = num_sessions
+    results.total_bets      = num_sessions # The extra count the loop engine adds as each session ends
+
+    goal_cash = rules.cash_available + rules.goal # Cash at which current_money reaches the goal
+    cash      = np.full(num_sessions, rules.cash_available, dtype=np.int64)
+    bet       = np.full(num_sessions, rules.unit, dtype=np.int64)
+    lowest    = rules.cash_available
+    placed    = 0 # Bets placed by the sessions that have played longest
+    if chart is not None:
+        bets_made = np.zeros(num_sessions, dtype=np.int64)
+        chart.sample(0, cash)
+    if writer is not None:
+        carried         = cash.copy()
+        carried_lengths = np.ones(num_sessions, dtype=np.int64)
+        numbers         = first_number + np.arange(num_sessions) # Session numbers of the sessions still playing
+
+    while cash.size:
+        num_bets = min(MAX_BLOCK_BETS, max(1, BLOCK_DRAWS // cash.size))
+        flips    = rng.random((num_bets, cash.size)) < rules.win_probability
+        playing  = np.ones(cash.size, dtype=bool)
+        if writer is not None:
+            history     = []
+            block_bets  = np.zeros(cash.size, dtype=np.int64)
+        for won in flips:
+            stake   = np.where(playing, bet, 0)
+            lowest  = min(lowest, int(cash[playing].min()))
+            results.total_bets   += int(np.count_nonzero(playing))
+            results.total_staked += int(stake.sum())
+            results.max_bet       = max(results.max_bet, int(stake.max()))
+
+            cash    += np.where(won, stake, -stake)
+            bet      = np.where(won, rules.unit, np.minimum(bet * 2, rules.max_bet))
+            placed  += 1
+            if chart is not None:
+                bets_made += playing
+            if writer is not None:
+                block_bets += playing
+                history.append(cash.copy())
+            playing &= (cash < goal_cash) & (cash > 0)
+            if not playing.any():
+                break
+            if chart is not None and placed % chart.bet_width == 0:
+                chart.sample(placed, cash[playing])
+
+        finished          = ~playing
+        results.num_wins += int(np.count_nonzero(cash[finished] >= goal_cash))
+        if chart is not None:
+            chart.finish(bets_made[finished], cash[finished])
+            bets_made = bets_made[playing]
+        if writer is not None:
+            # Each session's cash after every bet it placed this block, session by session
+            #
+            block                    = np.array(history).T
+            block                    = block[np.arange(block.shape[1]) < block_bets[:, None]]
+            carried, carried_lengths = concat_ragged(carried, carried_lengths, block, block_bets)
+            writer.append_many(*select_ragged(carried, carried_lengths, finished), numbers[finished])
+            carried, carried_lengths = select_ragged(carried, carried_lengths, playing)
+            numbers                  = numbers[playing]
+        cash              = cash[playing]
+        bet               = bet[playing]
+
+    results.max_amount_in_the_hole = rules.cash_available - lowest
+    return results
+
+
+def solve_session(rules : MartingaleRules = MartingaleRules()) -> MartingaleSolution:
+    '''
+    Solves a session exactly as an absorbing Markov chain.
+
+    Every losing streak starts from the base bet and follows the same bet sequence (doubling, capped at max_bet),
+    so the chain only needs the states where the bet is back at the base unit, one per reachable cash level.
+    One streak from cash c is k losses then a win (probability (1 - p)^k p), landing on another cash level
+    or the goal, or enough losses to go broke. That gives the streak transition matrix P between cash levels
+    and, per level, what a single streak adds (ruin, bets, amount staked, final cash on absorbing).
+    Each expectation x over the whole session then solves (I - P) x = r.
+    A streak can only land on as many levels as it has bets, so P is stored sparse and I - P is factorised
+    once for all four expectations.
+    '''
+    p         = rules.win_probability
+    q         = 1 - p
+    step      = math.gcd(rules.cash_available, rules.unit, rules.max_bet, rules.goal) # Every cash level is a multiple
+    goal_cash = rules.cash_available + rules.goal
+    levels    = np.arange(step, goal_cash, step) # Cash levels a session can be part way through at the base bet
+    size      = len(levels)
+
+    rows        = [] # Transitions as (from level, to level, probability) triples, summed when converted
+    columns     = []
+    values      = []
+    rewards     = np.zeros((size, 4)) # Ruin, bets, staked, final cash on absorbing, each per streak
+    cash        = levels.copy()       # Cash before the kth bet of the streak
+    reach       = np.ones(size)       # Probability the streak gets to the kth bet
+    bet         = rules.unit
+    staked      = 0
+    playing     = np.ones(size, dtype=bool)
+    while playing.any():
+        staked += bet
+        rewards[playing, 1] += reach[playing]
+        rewards[playing, 2] += reach[playing] * bet
+
+        # Win the kth bet, back to the base bet at a new cash level or done.
+        #
+        won_cash = cash + bet
+        won      = reach * p
+        at_goal  = playing & (won_cash >= goal_cash)
+        rewards[at_goal, 3] += won[at_goal] * won_cash[at_goal]
+        returned = playing & ~at_goal
+        rows.append(np.nonzero(returned)[0])
+        columns.append(won_cash[returned] // step - 1)
+        values.append(won[returned])
+
+        # Lose it, broke or on to the next bet of the streak.
+        #
+        cash   -= bet
+        reach  *= q
+        broke   = playing & (cash <= 0)
+        rewards[broke, 0] += reach[broke]
+        rewards[broke, 3] += reach[broke] * cash[broke]
+        playing &= ~broke
+        bet      = min(bet * 2, rules.max_bet)
+
+    transitions = sparse.csc_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))), shape=(size, size))
+    solution    = splu(sparse.identity(size, format='csc') - transitions).solve(rewards)[rules.cash_available // step - 1]
+    return MartingaleSolution(
+        float(solution[0]),
+        float(solution[1]),
+        float(solution[2]),
+        float(solution[3]) - rules.cash_available)
+
+
+def play_martingale():
+    '''
+    The entry point of the martingale simulator.
+    '''
+    rules = MartingaleRules()
+
+    print(f'You are bringing ${rules.cash_available} to the casino.')
+    print(f'Your base bet is ${rules.unit}')
+    print(f'Your goal winnings are ${rules.goal}')
+
+    # CASH_AVAILABLE  = int(input('How much money are you bringing to the casino? $'))
+    # UNIT            = int(input('What is your base bet? $'))
+    # GOAL            = int(input('What do you want to walk home with? $'))
+
+    print(f'\nRunning {NUM_SIMULATIONS} simulations ... \n')
+
+    if ANALYTIC:
+        solution = solve_session(rules)
+        solution.print_summary(rules)
+        return solution
+
+    if VECTORIZED and (PLOT_SELECTION is PlotSelection.NONE or TRAJECTORY_PATH is not None):
+        chart  = FanChart(rules) if FAN_CHART else None
+        writer = None
+        if TRAJECTORY_PATH is not None:
+            os.makedirs(os.path.dirname(TRAJECTORY_PATH) or '.', exist_ok=True)
+            writer = TrajectoryWriter(TRAJECTORY_PATH)
+        results = simulate_sessions(NUM_SIMULATIONS, rules, SEED, chart=chart, writer=writer, checkpoint_path=CHECKPOINT_PATH)
+        if chart is not None:
+            chart.render(os.path.join(PLOTS_DIR, 'FanChart.png'))
+        if writer is not None:
+            writer.close()
+            store    = TrajectoryStore(TRAJECTORY_PATH)
+            finals   = store.final_values()
+            numbers  = store.numbers.tolist()
+            sessions = [ (numbers[i], store[i]) for i in range(len(store)) if is_selected(PLOT_SELECTION, numbers[i], finals[i], PLOT_EVERY) ]
+            render_sessions(sessions, rules, PLOTS_DIR, NUM_WORKERS)
+    else:
+        random.seed(SEED)
+        results  = MartingaleResults()
+        sessions = []
+        for number in range(1, NUM_SIMULATIONS + 1):
+            cash = simulate_session(rules, results)
+            if is_selected(PLOT_SELECTION, number, cash[-1], PLOT_EVERY):
+                sessions.append((number, np.array(cash)))
+        render_sessions(sessions, rules, PLOTS_DIR, NUM_WORKERS)
+
+    results.print_summary(rules)
+    return results
+
+
+if __name__ == '__main__':
+    play_martingale()
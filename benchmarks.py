@@ -0,0 +1,210 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import numpy as np
+
+import InitialMartingaleSimulator as martingale
+from main import Deck, DealerStand, Hand, Rules, Table, TheBook, Verbosity
+
+
+'''
+Throughput benchmarks for the blackjack and martingale hot paths.
+
+    python benchmarks.py run [--output results.json] [--quick]
+    python benchmarks.py compare baseline.json results.json [--threshold 0.05]
+
+run times each benchmark as the best of several repeats (the least disturbed by anything else
+on the machine) and saves operations per second as JSON. compare lines two result files up and
+exits non zero if any benchmark got slower by more than the threshold, so it can gate a change.
+Everything runs offline on fixed seeds.
+'''
+
+REPEATS   = 5
+THRESHOLD = 0.05 # Fractional slowdown compare calls a regression
+
+
+def bench_hand_totals(scale : int) -> tuple:
+    '''
+    Hand.totals on a mix of hard, soft and pair hands.
+    '''
+    hands = []
+    for cards in ((10, 6), (1, 6), (8, 8), (1, 1, 9), (5, 3, 4, 2)):
+        hand = Hand()
+        for card in cards:
+            hand.add_card(card)
+        hands.append(hand)
+    count = 20_000 * scale
+    start = time.perf_counter()
+    for _ in range(count // len(hands)):
+        for hand in hands:
+            hand.totals()
+    return count, time.perf_counter() - start
+
+
+def bench_deck_draw_card(scale : int) -> tuple:
+    '''
+    Deck.draw_card through whole eight deck shoes, including the shuffles between them.
+    '''
+    deck  = Deck(8, np.random.default_rng(1))
+    size  = len(deck.cards)
+    count = 0
+    start = time.perf_counter()
+    for _ in range(50 * scale):
+        deck.shuffle()
+        for _ in range(size):
+            deck.draw_card()
+        count += size
+    return count, time.perf_counter() - start
+
+
+def bench_book_player_best_move(scale : int) -> tuple:
+    '''
+    TheBook.player_best_move over every two card hand against every face card.
+    '''
+    book  = TheBook(Rules(6, 1, 0, 1.5, True, False, False, False, DealerStand.STAND_SOFT_SEVENTEEN))
+    hands = []
+    for first in range(1, 14):
+        for second in range(first, 14):
+            hand = Hand()
+            hand.add_card(first)
+            hand.add_card(second)
+            hands.append(hand)
+    count = 0
+    start = time.perf_counter()
+    for _ in range(2 * scale):
+        for hand in hands:
+            for face_card in range(1, 14):
+                book.player_best_move(hand, face_card, False)
+        count += len(hands) * 13
+    return count, time.perf_counter() - start
+
+
+def bench_table(num_players : int, scale : int) -> tuple:
+    '''
+    Rounds of Table.play_hands with num_players seats.
+    '''
+    rules = Rules(6, num_players, 0, 1.5, True, False, False, False, DealerStand.STAND_SOFT_SEVENTEEN)
+    table = Table(rules, 1, Verbosity.SILENT)
+    count = 2_000 * scale
+    start = time.perf_counter()
+    table.play_hands(count)
+    return count, time.perf_counter() - start
+
+
+def bench_martingale_loop(scale : int) -> tuple:
+    '''
+    Sessions of the one at a time martingale loop, simulate_session.
+    '''
+    random.seed(1)
+    rules   = martingale.MartingaleRules()
+    results = martingale.MartingaleResults()
+    count   = 5_000 * scale
+    start   = time.perf_counter()
+    for _ in range(count):
+        martingale.simulate_session(rules, results)
+    return count, time.perf_counter() - start
+
+
+def bench_martingale_vectorized(scale : int) -> tuple:
+    '''
+    Sessions of the vectorized martingale engine, simulate_sessions.
+    '''
+    count = 200_000 * scale
+    start = time.perf_counter()
+    martingale.simulate_sessions(count, seed=1)
+    return count, time.perf_counter() - start
+
+
+# name : (function, unit)
+#
+BENCHMARKS = {
+    'hand_totals'            : (bench_hand_totals,                        'calls/s'),
+    'deck_draw_card'         : (bench_deck_draw_card,                     'cards/s'),
+    'book_player_best_move'  : (bench_book_player_best_move,              'calls/s'),
+    'table_1_player'         : (lambda scale : bench_table(1, scale),     'hands/s'),
+    'table_6_players'        : (lambda scale : bench_table(6, scale),     'hands/s'),
+    'martingale_loop'        : (bench_martingale_loop,                    'sessions/s'),
+    'martingale_vectorized'  : (bench_martingale_vectorized,              'sessions/s'),
+}
+
+
+def run(names : list = None, repeats : int = REPEATS, scale : int = 1) -> dict:
+    '''
+    Runs the named benchmarks (all by default) and returns the results, ready to save as JSON.
+    '''
+    results = {}
+    for name in names or BENCHMARKS:
+        function, unit = BENCHMARKS[name]
+        rates          = []
+        for _ in range(repeats):
+            count, seconds = function(scale)
+            rates.append(count / seconds)
+        results[name] = { 'ops_per_sec' : max(rates), 'unit' : unit, 'repeats' : repeats, 'rates' : rates }
+        print(f'{name:<24} {max(rates):>14,.0f} {unit}')
+
+    return {
+        'created'    : time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python'     : sys.version.split()[0],
+        'numpy'      : np.__version__,
+        'platform'   : platform.platform(),
+        'benchmarks' : results,
+    }
+
+
+def compare(baseline : dict, results : dict, threshold : float = THRESHOLD) -> list:
+    '''
+    Prints each benchmark's change from baseline and returns the names of those slower by more than threshold.
+    '''
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            print(f'{name:<24} {"new":>10}')
+            continue
+        change = result['ops_per_sec'] / baseline['benchmarks'][name]['ops_per_sec'] - 1
+        flag   = ''
+        if change < -threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif change > threshold:
+            flag = 'faster'
+        print(f'{name:<24} {change * 100:>+9.1f}%  {flag}')
+    return regressions
+
+
+def main(argv : list = None) -> int:
+    parser   = argparse.ArgumentParser(description='Throughput benchmarks for the blackjack and martingale hot paths.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks and save the results as JSON')
+    run_parser.add_argument('--output', default='benchmark_results.json')
+    run_parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='run just these benchmarks')
+    run_parser.add_argument('--repeats', type=int, default=REPEATS)
+    run_parser.add_argument('--quick', action='store_true', help='one repeat each, for a smoke test')
+
+    compare_parser = commands.add_parser('compare', help='compare two result files and fail on regressions')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--threshold', type=float, default=THRESHOLD)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        results = run(args.only, 1 if args.quick else args.repeats)
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=1)
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.results) as file:
+        results = json.load(file)
+    regressions = compare(baseline, results, args.threshold)
+    if regressions:
+        print(f'{len(regressions)} regression(s) beyond {args.threshold * 100:.0f}%: {", ".join(regressions)}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+from main import Rules, Table, TheBook, Verbosity
+from martingale_rules import MartingaleRules
+
+
+'''
+Betting systems over cached blackjack outcomes.
+
+Which cards come out and how every seat plays them doesn't depend on how much is bet, so a blackjack
+run only has to be played once per seed. record_outcomes keeps each seat's net result per unit bet for
+every round (doubles, splits and the blackjack payout included), along with the count each round was
+bet at when the seats are counting, and cached_outcomes saves that to OUTCOME_CACHE_DIR.
+
+A betting system is then just a rule for the next bet. evaluate cuts every seat's stream into sessions
+and plays them all in lockstep, sizing each bet with the system and stopping a session at its goal or
+when it goes broke, the same way as the martingale simulator, so each system costs one array pass.
+'''
+
+OUTCOME_CACHE_DIR = 'OutcomeCache'
+OUTCOME_VERSION   = 1 # Bump to invalidate cached outcomes when the game changes
+SESSION_LENGTH    = 1000
+MAX_UNITS         = 1 << 40 # Progressions stop growing here, well past any table limit
+
+FIBONACCI = (1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377, 610, 987, 1597, 2584, 4181, 6765)
+
+
+def outcomes_key(rules : Rules, seed : int, book : TheBook = None, counting = None) -> str:
+    '''
+    Hash of everything that changes the recorded outcomes.
+    '''
+    fields = {
+        'version'  : OUTCOME_VERSION,
+        'rules'    : { name : getattr(value, 'name', value) for name, value in vars(rules).items() },
+        'seed'     : seed,
+        'book'     : None if book is None else [ action.name for action in book.book ],
+        'counting' : None if counting is None else repr(counting),
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def record_outcomes(rules : Rules, seed : int, book : TheBook = None, counting = None) -> tuple:
+    '''
+    Plays rules.num_simulations rounds and returns (outcomes, counts). outcomes[round, seat] is the seat's
+    net result over its initial bet. counts[round] is the count index the round was bet at, or None without counting.
+    '''
+    table    = Table(rules, seed, Verbosity.SILENT, book=book, counting=counting)
+    outcomes = np.empty((rules.num_simulations, rules.num_players), dtype=np.float32)
+    counts   = np.empty(rules.num_simulations, dtype=np.int8) if counting is not None else None
+    played   = 0
+
+    def record(dealer) -> None:
+        nonlocal played
+        for seat, player in enumerate(dealer.players):
+            outcomes[played, seat] = sum(hand.net for hand in player.hands) / player.bet_size
+        if counts is not None:
+            counts[played] = dealer.players[0].count_index
+        played += 1
+
+    table.play_hands(rules.num_simulations, record)
+    return outcomes, counts
+
+
+def cached_outcomes(rules : Rules, seed : int, book : TheBook = None, counting = None, cache_dir : str = OUTCOME_CACHE_DIR) -> tuple:
+    '''
+    record_outcomes, loaded from the cache if this run has been recorded before.
+    '''
+    assert seed is not None, 'Error: Outcomes can only be cached for a fixed seed.'
+    path = os.path.join(cache_dir, f'{outcomes_key(rules, seed, book, counting)}.npz')
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return cached['outcomes'], cached['counts'] if 'counts' in cached else None
+
+    outcomes, counts = record_outcomes(rules, seed, book, counting)
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f'{path}.tmp.npz'
+    if counts is None:
+        np.savez(temp_path, outcomes=outcomes)
+    else:
+        np.savez(temp_path, outcomes=outcomes, counts=counts)
+    os.replace(temp_path, path)
+    return outcomes, counts
+
+
+class BettingSystem:
+    '''
+    Base class for betting systems, played on many sessions at once.
+    Subclasses implement reset, units and settle on arrays with one entry per session.
+    '''
+    name = 'Betting System'
+
+    def reset(self, num_sessions : int) -> None:
+        pass
+
+    def units(self, counts : np.ndarray) -> np.ndarray:
+        '''
+        The next bet of every session in base units. counts is the count index of the round, or None.
+        '''
+        raise NotImplementedError
+
+    def settle(self, outcomes : np.ndarray) -> None:
+        '''
+        Updates the progression with each session's result per unit bet (0 for sessions that are done).
+        '''
+        pass
+
+
+class FlatBetting(BettingSystem):
+    '''
+    The same bet every round.
+    '''
+    def __init__(self, units : int = 1) -> None:
+        self.name      = f'Flat {units}'
+        self.num_units = units
+
+    def reset(self, num_sessions : int) -> None:
+        self.bets = np.full(num_sessions, self.num_units, dtype=np.int64)
+
+    def units(self, counts : np.ndarray) -> np.ndarray:
+        return self.bets
+
+
+class Martingale(BettingSystem):
+    '''
+    Double the bet after a loss, back to one unit after a win, and the same again after a push.
+    '''
+    name = 'Martingale'
+
+    def reset(self, num_sessions : int) -> None:
+        self.bets = np.ones(num_sessions, dtype=np.int64)
+
+    def units(self, counts : np.ndarray) -> np.ndarray:
+        return self.bets
+
+    def settle(self, outcomes : np.ndarray) -> None:
+        self.bets = np.where(outcomes > 0, 1, np.where(outcomes < 0, np.minimum(self.bets * 2, MAX_UNITS), self.bets))
+
+
+class Fibonacci(BettingSystem):
+    '''
+    Bet along the Fibonacci sequence, one step on after a loss and two steps back after a win.
+    '''
+    name = 'Fibonacci'
+
+    def reset(self, num_sessions : int) -> None:
+        self.sequence  = np.array(FIBONACCI, dtype=np.int64)
+        self.positions = np.zeros(num_sessions, dtype=np.int64)
+
+    def units(self, counts : np.ndarray) -> np.ndarray:
+        return self.sequence[self.positions]
+
+    def settle(self, outcomes : np.ndarray) -> None:
+        stepped        = np.where(outcomes > 0, self.positions - 2, np.where(outcomes < 0, self.positions + 1, self.positions))
+        self.positions = np.clip(stepped, 0, len(self.sequence) - 1)
+
+
+class CountBetting(BettingSystem):
+    '''
+    Bet by the count, in units once the count index reaches each key of spread. Needs outcomes recorded with counting.
+    '''
+    def __init__(self, spread : dict, name : str = 'Count') -> None:
+        self.name   = name
+        self.spread = sorted(spread.items())
+
+    def units(self, counts : np.ndarray) -> np.ndarray:
+        assert counts is not None, 'Error: Count betting needs outcomes recorded with counting.'
+        units = np.ones(len(counts), dtype=np.int64)
+        for threshold, threshold_units in self.spread:
+            units[counts >= threshold] = threshold_units
+        return units
+
+
+class BettingResults:
+    '''
+    Summary of one betting system over every session.
+    '''
+    def __init__(self, name : str, num_sessions : int) -> None:
+        self.name          = name
+        self.num_sessions  = num_sessions
+        self.num_goals     = 0 # Sessions that reached the goal
+        self.num_ruined    = 0 # Sessions that went broke
+        self.num_rounds    = 0
+        self.total_staked  = 0.0
+        self.total_net     = 0.0
+
+    def edge(self) -> float:
+        '''
+        Net result per dollar staked.
+        '''
+        return self.total_net / self.total_staked if self.total_staked else 0.0
+
+    def summary_str(self) -> str:
+        return (f'{self.name:<20} goal {round(self.num_goals / self.num_sessions * 100, 2):>6}%'
+                f'  broke {round(self.num_ruined / self.num_sessions * 100, 2):>6}%'
+                f'  rounds {round(self.num_rounds / self.num_sessions, 1):>7}'
+                f'  staked ${round(self.total_staked / self.num_sessions, 2):>10}'
+                f'  net ${round(self.total_net / self.num_sessions, 2):>9}'
+                f'  edge {round(self.edge() * 100, 3):>7}%')
+
+
+def sessions_of(outcomes : np.ndarray, counts : np.ndarray, session_length : int = SESSION_LENGTH) -> tuple:
+    '''
+    Cuts every seat's stream into sessions of session_length rounds.
+    Returns (outcomes, counts) as (round, session) arrays, dropping each seat's leftover rounds.
+    '''
+    num_rounds, num_seats = outcomes.shape
+    per_seat = num_rounds // session_length
+    used     = per_seat * session_length
+    sessions = outcomes[:used].T.reshape(num_seats * per_seat, session_length).T
+    if counts is None:
+        return sessions, None
+    return sessions, np.tile(counts[:used].reshape(per_seat, session_length), (num_seats, 1)).T
+
+
+def evaluate(system       : BettingSystem,
+             outcomes     : np.ndarray,
+             counts       : np.ndarray = None,
+             rules        : MartingaleRules = MartingaleRules(),
+             stop_at_goal : bool = True) -> BettingResults:
+    '''
+    Plays system over (round, session) outcomes from sessions_of, betting system.units times rules.unit
+    capped at rules.max_bet. Each session starts with rules.cash_available and stops when it goes broke, or
+    reaches rules.goal if stop_at_goal, or runs out of rounds.
+    '''
+    num_sessions = outcomes.shape[1]
+    results      = BettingResults(system.name, num_sessions)
+    goal_cash    = rules.cash_available + rules.goal if stop_at_goal else np.inf
+    cash         = np.full(num_sessions, float(rules.cash_available))
+    playing      = np.ones(num_sessions, dtype=bool)
+    system.reset(num_sessions)
+    for round_number, outcome in enumerate(outcomes):
+        count  = None if counts is None else counts[round_number]
+        stake  = np.where(playing, np.minimum(system.units(count) * rules.unit, rules.max_bet), 0)
+        net    = outcome * stake
+        cash  += net
+        results.num_rounds   += int(np.count_nonzero(playing))
+        results.total_staked += float(stake.sum())
+        results.total_net    += float(net.sum())
+
+        system.settle(np.where(playing, outcome, 0))
+        playing &= (cash < goal_cash) & (cash > 0)
+        if not playing.any():
+            break
+
+    results.num_goals  = int(np.count_nonzero(cash >= goal_cash))
+    results.num_ruined = int(np.count_nonzero(cash <= 0))
+    return results
+
+
+def compare(systems        : list,
+            outcomes       : np.ndarray,
+            counts         : np.ndarray = None,
+            rules          : MartingaleRules = MartingaleRules(),
+            session_length : int = SESSION_LENGTH,
+            stop_at_goal   : bool = True) -> list:
+    '''
+    Evaluates every system on the same sessions and prints a line for each.
+    '''
+    outcomes, counts = sessions_of(outcomes, counts, session_length)
+    results          = [ evaluate(system, outcomes, counts, rules, stop_at_goal) for system in systems ]
+    for result in results:
+        print(result.summary_str())
+    return results
+
+
+if __name__ == '__main__':
+    '''
+    Compares a few betting systems on one cached six deck run, with the seats counting Hi-Lo and flat betting
+    so the recorded count is there for count betting.
+    '''
+    from counting import CountingStrategy
+    from main import DealerStand
+
+    RULES    = Rules(6, 6, 200_000, 1.5, True, False, False, False, DealerStand.STAND_SOFT_SEVENTEEN, 0.8)
+    COUNTING = CountingStrategy(bet_spread={})
+    SESSION  = MartingaleRules(cash_available=5_000, unit=100, max_bet=500, goal=1_000)
+
+    outcomes, counts = cached_outcomes(RULES, 1, counting=COUNTING)
+    compare([
+        FlatBetting(),
+        Martingale(),
+        Fibonacci(),
+        CountBetting({ 2 : 2, 3 : 4, 4 : 5 }, 'Count 1-5'),
+    ], outcomes, counts, SESSION)
@@ -0,0 +1,73 @@
+import hashlib
+import os
+import pickle
+
+
+'''
+Checkpoints for long runs.
+
+A checkpoint is everything a run needs to carry on exactly where it was (the shoe order and cursor,
+the generator state, every accumulator and how far it got), pickled with a small header. Saves go to
+a temporary file that is synced and then renamed over the last checkpoint, so an interruption at
+any point leaves either the old checkpoint or the new one, never half of one.
+
+Every checkpoint carries the key of the run that saved it (see run_key), and loading it for a run
+with a different key fails, so a stale checkpoint left by another configuration is never resumed
+as if it were this run's.
+'''
+
+CHECKPOINT_MAGIC   = b'MSCHKPT'
+CHECKPOINT_VERSION = 4 # Bump when the saved state changes shape, so old checkpoints aren't resumed
+
+
+def run_key(*arguments) -> str:
+    '''
+    A digest of the arguments that decide what a run computes, from their reprs.
+    An unseeded run draws fresh entropy every time it starts, so it never matches its own checkpoints.
+    '''
+    return hashlib.sha256(repr(arguments).encode()).hexdigest()
+
+
+def save_checkpoint(path : str, key : str, state) -> None:
+    '''
+    Atomically replaces the checkpoint at path with state, saved by the run with key.
+    '''
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(CHECKPOINT_MAGIC + bytes([ CHECKPOINT_VERSION ]))
+        pickle.dump((key, state), file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path : str, key : str):
+    '''
+    The state saved at path, or None if there is no checkpoint there.
+    Raises ValueError if the checkpoint was saved by a run with a different key.
+    '''
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as file:
+        header = file.read(len(CHECKPOINT_MAGIC) + 1)
+        assert header[:-1] == CHECKPOINT_MAGIC, f'Error: {path} is not a checkpoint.'
+        assert header[-1] == CHECKPOINT_VERSION, f'Error: {path} is from an incompatible version.'
+        saved_key, state = pickle.load(file)
+    if saved_key != key:
+        raise ValueError(f'Error: {path} was saved by a different run (rules, seed or settings). Remove it to start this run.')
+    return state
+
+
+def remove_checkpoint(path : str) -> None:
+    '''
+    Removes a finished run's checkpoint.
+    '''
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def worker_path(path : str, worker : int) -> str:
+    '''
+    The checkpoint path for one worker of a parallel run.
+    '''
+    return f'{path}.{worker}'
@@ -0,0 +1,240 @@
+from dataclasses import dataclass, field
+import numpy as np
+
+from main import (BASE_BET, DECK_RANKS, HARD_STATE, NUM_RANKS, PAIR_STATE, SOFT_STATE,
+                  Deck, Hand, Player, PlayerAction, Rules, TheBook)
+
+
+'''
+Card counting.
+
+A CountingDeck tabulates the running count and count index for every position of the shoe when
+it is shuffled, so drawing a card costs nothing extra and reading the count is one list index.
+A CountingStrategy precomputes one compiled book per count index (the base book with the deviations
+for that count applied) and one bet per count index, so a counting player's decision is still a
+couple of list indexes.
+'''
+
+# Count indices are clamped to this range when looking up bets and deviations.
+#
+MIN_INDEX = -20
+MAX_INDEX = 20
+
+
+@dataclass(frozen=True)
+class CountingSystem:
+    '''
+    Tags by rank code (index 0 unused) for a counting system.
+    Balanced systems are indexed by true count, unbalanced ones by running count.
+    '''
+    name:     str
+    tags:     tuple
+    balanced: bool = True
+
+    def initial_count(self, num_decks : int) -> int:
+        '''
+        Running count off the top of the shoe. Unbalanced systems start below zero so their pivot lands at +4.
+        '''
+        return 0 if self.balanced else 4 - 4 * num_decks
+
+
+#                                A  2  3  4  5  6  7  8  9   T   J   Q   K
+HI_LO    = CountingSystem('Hi-Lo',    (0, -1, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1))
+KO       = CountingSystem('KO',       (0, -1, 1, 1, 1, 1, 1, 1, 0, 0, -1, -1, -1, -1), balanced=False)
+OMEGA_II = CountingSystem('Omega II', (0,  0, 1, 1, 2, 2, 2, 1, 0, -1, -2, -2, -2, -2))
+
+
+class CountingDeck(Deck):
+    '''
+    A Deck that knows the running count and count index at every position of the shoe.
+    The order of the cards is fixed from one shuffle to the next, so both are tabulated for every cursor
+    position when the shoe is shuffled, and drawing a card costs exactly what it does in a plain Deck.
+    '''
+    def __init__(self, num_decks : int, rng : np.random.Generator, penetration : float, system : CountingSystem):
+        size               = len(DECK_RANKS) * num_decks
+        self.system        = system
+        self.tags          = np.array(system.tags, dtype=np.int64)
+        self.balanced      = system.balanced
+        self.initial_count = system.initial_count(num_decks)
+        self.counts        = np.empty(size + 1, dtype=np.int64) # Running count with cursor at each position
+        self.remaining     = np.maximum(size - np.arange(size + 1), 1) # Cards left with cursor at each position (at least 1)
+        super().__init__(num_decks, rng, penetration)
+
+    def shuffle(self) -> None:
+        super().shuffle()
+        self.tabulate()
+
+    def reshuffle_discards(self) -> None:
+        '''
+        The cards still in play have been seen, so they stay counted.
+        '''
+        super().reshuffle_discards()
+        self.tabulate()
+
+    def tabulate(self) -> None:
+        '''
+        Works out the running count and count index with the cursor at each position of the shoe as it now lies.
+        Cards ahead of the cursor (still in play after a mid round reshuffle) are counted from the start.
+        '''
+        counts       = self.counts
+        counts[0]    = self.initial_count
+        np.take(self.tags, self.cards, out=counts[1:])
+        np.cumsum(counts, out=counts)
+        indices      = counts * 52 // self.remaining if self.balanced else counts
+        self.indices = np.minimum(np.maximum(indices, MIN_INDEX), MAX_INDEX).tolist()
+
+    @property
+    def running_count(self) -> int:
+        return int(self.counts[self.cursor])
+
+    def true_count(self) -> float:
+        return self.running_count * 52 / max(len(self.cards) - self.cursor, 1)
+
+    def count_index(self) -> int:
+        '''
+        The count bets and deviations are keyed by, clamped to [MIN_INDEX, MAX_INDEX].
+        Balanced systems use the true count rounded down, unbalanced ones the running count.
+        '''
+        return self.indices[self.cursor]
+
+
+@dataclass(frozen=True)
+class Deviation:
+    '''
+    Play action instead of the book with state (see hard, soft and pair) against face_value
+    when the count index is at or above index (or at or below it, if above is False).
+    '''
+    state:      int
+    face_value: int
+    index:      int
+    action:     PlayerAction
+    above:      bool = True
+
+
+def hard(total : int) -> int:
+    return HARD_STATE + total
+
+def soft(total : int) -> int:
+    return SOFT_STATE + total
+
+def pair(value : int) -> int:
+    return PAIR_STATE + value
+
+
+# The common Hi-Lo index plays, less insurance and surrender which the table doesn't offer.
+#
+HI_LO_DEVIATIONS = (
+    Deviation(hard(16), 10,  0, PlayerAction.STAND),
+    Deviation(hard(15), 10,  4, PlayerAction.STAND),
+    Deviation(pair(10),  5,  5, PlayerAction.SPLIT),
+    Deviation(pair(10),  6,  4, PlayerAction.SPLIT),
+    Deviation(hard(10), 10,  4, PlayerAction.DOUBLE_DOWN),
+    Deviation(hard(12),  3,  2, PlayerAction.STAND),
+    Deviation(hard(12),  2,  3, PlayerAction.STAND),
+    Deviation(hard(11),  1,  1, PlayerAction.DOUBLE_DOWN),
+    Deviation(hard(9),   2,  1, PlayerAction.DOUBLE_DOWN),
+    Deviation(hard(10),  1,  4, PlayerAction.DOUBLE_DOWN),
+    Deviation(hard(9),   7,  3, PlayerAction.DOUBLE_DOWN),
+    Deviation(hard(16),  9,  5, PlayerAction.STAND),
+    Deviation(hard(13),  2, -2, PlayerAction.HIT, above=False), # The published indices for these are where to
+    Deviation(hard(12),  4, -1, PlayerAction.HIT, above=False), # stand, so hit only below them
+    Deviation(hard(12),  5, -3, PlayerAction.HIT, above=False),
+    Deviation(hard(12),  6, -2, PlayerAction.HIT, above=False),
+    Deviation(hard(13),  3, -3, PlayerAction.HIT, above=False),
+)
+
+# Index plays by counting system. The indices are on the system's own count scale, so a system
+# without its own plays (KO, Omega II) plays the book unless given some.
+#
+DEVIATIONS = { HI_LO : HI_LO_DEVIATIONS }
+
+# Bet in base units once the count index reaches each key.
+#
+HI_LO_BET_SPREAD = { 2 : 2, 3 : 4, 4 : 6, 5 : 8 }
+
+
+@dataclass
+class CountingStrategy:
+    '''
+    A counting system plus what the player does with the count.
+    deviations defaults to the system's own index plays (see DEVIATIONS).
+    Pass one to Table(counting=...) to have every seat count.
+    '''
+    system:     CountingSystem = HI_LO
+    bet_spread: dict           = field(default_factory=lambda : dict(HI_LO_BET_SPREAD))
+    deviations: tuple          = None
+
+    def __post_init__(self) -> None:
+        if self.deviations is None:
+            self.deviations = DEVIATIONS.get(self.system, ())
+        self.base_book = None
+        self.books     = None
+        self.bets      = [ BASE_BET * self.units(index) for index in range(MIN_INDEX, MAX_INDEX + 1) ]
+
+    def units(self, index : int) -> int:
+        units = 1
+        for threshold, threshold_units in sorted(self.bet_spread.items()):
+            if index >= threshold:
+                units = threshold_units
+        return units
+
+    def compile(self, book : tuple) -> list:
+        '''
+        One compiled book per count index, each the base book with its deviations applied.
+        '''
+        books = []
+        for index in range(MIN_INDEX, MAX_INDEX + 1):
+            deviated = list(book)
+            for deviation in self.deviations:
+                if index >= deviation.index if deviation.above else index <= deviation.index:
+                    for face_card in range(1, NUM_RANKS):
+                        if min(face_card, 10) == deviation.face_value:
+                            deviated[deviation.state * NUM_RANKS + face_card] = deviation.action
+            books.append(tuple(deviated))
+        return books
+
+    def make_shoe(self, rules : Rules, rng : np.random.Generator) -> CountingDeck:
+        return CountingDeck(rules.num_decks, rng, rules.penetration, self.system)
+
+    def make_player(self, rules : Rules, book : TheBook, shoe : CountingDeck) -> 'CountingPlayer':
+        if self.books is None or self.base_book is not book.book:
+            self.base_book = book.book
+            self.books     = self.compile(book.book)
+        return CountingPlayer(rules, CountingBook(rules, self.books, shoe), self.bets, shoe)
+
+
+class CountingBook(TheBook):
+    '''
+    A TheBook that picks the deviated book for the shoe's current count.
+    '''
+    def __init__(self, rules : Rules, books : list, shoe : CountingDeck):
+        super().__init__(rules, books[-MIN_INDEX])
+        self.books = books
+        self.shoe  = shoe
+
+    def player_best_move(self, hand : Hand, face_card : int, has_split : bool) -> PlayerAction:
+        shoe = self.shoe
+        return self.books[shoe.indices[shoe.cursor] - MIN_INDEX][self.hand_state(hand, has_split) * NUM_RANKS + face_card]
+
+
+class CountingPlayer(Player):
+    '''
+    A Player that sizes each bet from the count before the deal.
+    '''
+    def __init__(self, rules : Rules, book : CountingBook, bets : list, shoe : CountingDeck) -> None:
+        self.bets = bets
+        self.shoe = shoe
+        super().__init__(rules, book)
+
+    def reset(self, count_index : int = None):
+        '''
+        Resets the player and bets by count_index, the round's count from Dealer.reset_table (read off the shoe if not given).
+        '''
+        if count_index is None:
+            count_index = self.shoe.count_index()
+        hand             = Hand() # Player.reset, inlined since it runs for every seat every round
+        hand.bet_size    = self.bets[count_index - MIN_INDEX]
+        self.hands       = [ hand ]
+        self.bet_size    = hand.bet_size
+        self.has_split   = False
+        self.count_index = count_index # What this round was bet at
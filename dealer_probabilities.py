@@ -0,0 +1,118 @@
+from functools import lru_cache
+import numpy as np
+
+from main import DECK_RANKS, HARD_VALUES, DealerStand
+
+
+'''
+Exact dealer outcome probabilities.
+
+Given the cards left in the shoe and the dealer's face card, this works out the exact
+distribution of the dealer's final hand by recursing over every card the dealer could draw.
+Compositions are tuples of card counts by value (ace through ten, with tens grouped),
+and every sub-result is memoized by composition in a bounded LRU cache, so repeated
+questions about the same or nearby shoes are answered from the cache.
+
+The game has no hole card peek, so a dealer blackjack is one of the outcomes rather than conditioned away.
+'''
+
+# Outcome indices into a distribution.
+#
+OUTCOMES       = ('17', '18', '19', '20', '21', 'blackjack', 'bust')
+BLACKJACK      = 5
+BUST           = 6
+NUM_OUTCOMES   = len(OUTCOMES)
+CACHE_SIZE     = 1 << 20
+
+HARD_VALUES_ARRAY = np.array(HARD_VALUES)
+
+
+def composition_of(ranks : np.ndarray) -> tuple:
+    '''
+    Card counts by value (index 0 is aces, index 9 is tens) for an array of rank codes.
+    '''
+    return tuple(int(count) for count in np.bincount(HARD_VALUES_ARRAY[ranks], minlength=11)[1:])
+
+
+def shoe_composition(num_decks : int) -> tuple:
+    '''
+    The composition of a full shoe.
+    '''
+    return composition_of(np.tile(DECK_RANKS, num_decks))
+
+
+def remove_card(composition : tuple, value : int) -> tuple:
+    '''
+    Returns the composition with one card of the given value (1 - 10) taken out.
+    '''
+    assert composition[value - 1] > 0, f'Error: No {value}s left in the shoe.'
+    return composition[:value - 1] + (composition[value - 1] - 1,) + composition[value:]
+
+
+def dealer_distribution(composition : tuple, face_value : int, dealer_stand : DealerStand) -> tuple:
+    '''
+    Probabilities of each of OUTCOMES for a dealer showing face_value (1 - 10),
+    drawing from composition, which should already exclude the face card.
+    '''
+    hit_soft_seventeen = dealer_stand is DealerStand.HIT_SOFT_SEVENTEEN
+    return _outcomes(composition, HARD_VALUES[face_value], face_value == 1, 1, hit_soft_seventeen)
+
+
+def dealer_table(composition : tuple, dealer_stand : DealerStand) -> np.ndarray:
+    '''
+    A 10 x NUM_OUTCOMES array of outcome probabilities, one row per face card value (ace first),
+    each drawn from composition with that face card removed.
+    '''
+    table = np.zeros((10, NUM_OUTCOMES))
+    for face_value in range(1, 11):
+        if composition[face_value - 1] > 0:
+            table[face_value - 1] = dealer_distribution(remove_card(composition, face_value), face_value, dealer_stand)
+    return table
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _outcomes(composition : tuple, hard_total : int, has_ace : bool, num_cards : int, hit_soft_seventeen : bool) -> tuple:
+    '''
+    Outcome distribution of a dealer hand, following the same rules as TheBook.dealer_best_move.
+    '''
+    soft_total = hard_total + 10 if has_ace and hard_total <= 11 else hard_total
+    if hard_total > 21:
+        return _single(BUST)
+    if soft_total >= 17 and not (hit_soft_seventeen and soft_total == 17 and hard_total < 17):
+        if soft_total == 21 and num_cards == 2:
+            return _single(BLACKJACK)
+        return _single(soft_total - 17)
+
+    remaining     = sum(composition)
+    distribution  = [ 0.0 ] * NUM_OUTCOMES
+    for value in range(1, 11):
+        count = composition[value - 1]
+        if count == 0:
+            continue
+        probability = count / remaining
+        outcomes    = _outcomes(remove_card(composition, value), hard_total + value, has_ace or value == 1, num_cards + 1, hit_soft_seventeen)
+        for i in range(NUM_OUTCOMES):
+            distribution[i] += probability * outcomes[i]
+    return tuple(distribution)
+
+
+def _single(outcome : int) -> tuple:
+    distribution          = [ 0.0 ] * NUM_OUTCOMES
+    distribution[outcome] = 1.0
+    return tuple(distribution)
+
+
+def clear_cache() -> None:
+    _outcomes.cache_clear()
+
+
+if __name__ == '__main__':
+    '''
+    Prints the dealer outcome table for a fresh six deck shoe.
+    '''
+    for dealer_stand in DealerStand:
+        print(dealer_stand.name)
+        print('Face  ' + ''.join(f'{outcome:>10}' for outcome in OUTCOMES))
+        for face_value, row in enumerate(dealer_table(shoe_composition(6), dealer_stand), start=1):
+            print(f'{face_value:>4}  ' + ''.join(f'{probability:>10.4f}' for probability in row))
+        print()
@@ -0,0 +1,100 @@
+import cProfile
+
+
+'''
+Timing instrumentation for blackjack runs.
+
+A Table built with instrument=True plays through instrumented copies of its hand loop and table reset.
+Every round's cards drawn, splits, doubles and shuffles are counted from the table's state once the
+round is settled. The phases are timed on one round in SAMPLE_EVERY, since a clock read costs about as
+much as a small phase and timing every round would slow a run by a fifth; the sampled totals are scaled
+up to the whole run when reported. Nothing on the plain path changes, so a table without
+instrumentation pays nothing for it.
+
+profiled wraps any call in cProfile for when the phase totals aren't enough.
+'''
+
+# Phases, indexed so that GameState values (INITIAL_DEAL to CHECK_GAME_STATE) index their own phase.
+#
+RESET_PHASE   = 0 # Clearing the table between rounds
+SHUFFLE_PHASE = 5 # Clearing the table when the cut card has come out, shuffle included
+PHASE_NAMES   = ('reset table', 'initial deal', 'player action', 'dealer action', 'check game state', 'shuffle')
+
+SAMPLE_EVERY = 8 # Rounds per timed round. 1 times every round.
+
+
+class PhaseTimings:
+    '''
+    Mergeable per phase wall time and call counts over the timed rounds, plus what happened in every round.
+    '''
+    def __init__(self, sample_every : int = SAMPLE_EVERY) -> None:
+        self.sample_every = sample_every
+        self.seconds      = [ 0.0 ] * len(PHASE_NAMES) # Timed rounds only
+        self.calls        = [ 0 ] * len(PHASE_NAMES)   # Timed rounds only
+        self.timed_rounds = 0
+        self.elapsed      = 0.0 # Wall time of the whole run, so hands/sec includes everything between phases
+        self.rounds       = 0
+        self.cards_drawn  = 0
+        self.splits       = 0
+        self.doubles      = 0
+        self.shuffles     = 0 # Fresh shoes after the cut card
+        self.reshuffles   = 0 # Discard pile shuffled back in mid round because the shoe ran dry
+
+    def count_round(self, dealer, discarded : int) -> None:
+        '''
+        Counts a settled round. discarded is the shoe's discard pile size when the round started.
+        The cards in play are always those between the discard pile and the cursor, even after a mid round reshuffle.
+        '''
+        shoe              = dealer.shoe
+        self.rounds      += 1
+        self.cards_drawn += shoe.cursor - shoe.discarded
+        if discarded and not shoe.discarded:
+            self.reshuffles += 1
+        for player in dealer.players:
+            if player.has_split:
+                self.splits += 1
+            for hand in player.hands:
+                if hand.bet_size > player.bet_size:
+                    self.doubles += 1
+
+    def merge(self, other : 'PhaseTimings') -> None:
+        '''
+        Folds in another worker's timings. Workers run side by side, so the run took as long as the slowest.
+        '''
+        self.seconds       = [ mine + theirs for mine, theirs in zip(self.seconds, other.seconds) ]
+        self.calls         = [ mine + theirs for mine, theirs in zip(self.calls, other.calls) ]
+        self.timed_rounds += other.timed_rounds
+        self.elapsed       = max(self.elapsed, other.elapsed)
+        self.rounds       += other.rounds
+        self.cards_drawn  += other.cards_drawn
+        self.splits       += other.splits
+        self.doubles      += other.doubles
+        self.shuffles     += other.shuffles
+        self.reshuffles   += other.reshuffles
+
+    def hands_per_second(self) -> float:
+        return self.rounds / self.elapsed if self.elapsed else 0.0
+
+    def report_str(self) -> str:
+        timed = sum(self.seconds) or 1.0
+        scale = self.rounds / (self.timed_rounds or 1) # Timed rounds to all rounds
+        lines = [ f'{"Phase":<18} {"Timed Calls":>12} {"us/call":>9} {"Share":>7} {"Est. Seconds":>13}' ]
+        for name, seconds, calls in zip(PHASE_NAMES, self.seconds, self.calls):
+            lines.append(f'{name:<18} {calls:>12} {seconds / (calls or 1) * 1e6:>9.2f} {seconds / timed * 100:>6.1f}% {seconds * scale:>13.3f}')
+        lines.append(f'Cards drawn: {self.cards_drawn}. Splits: {self.splits}. Doubles: {self.doubles}. '
+                     f'Shuffles: {self.shuffles}. Mid round reshuffles: {self.reshuffles}.')
+        lines.append(f'{self.rounds} hands in {round(self.elapsed, 3)}s: {round(self.hands_per_second())} hands/sec')
+        return '\n'.join(lines)
+
+
+def profiled(path : str, function, *args, **kwargs):
+    '''
+    Calls function under cProfile and dumps the profile to path, to read with pstats (or snakeviz).
+    Only this process is profiled, so profile a single worker run to see where the hands spend their time.
+    '''
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+        print(f'Profile saved to {path}')
@@ -1,16 +1,23 @@
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
-import random
+import numpy as np
+import time
+
+from checkpoint import load_checkpoint, remove_checkpoint, run_key, save_checkpoint, worker_path
+from instrumentation import RESET_PHASE, SHUFFLE_PHASE, PhaseTimings, profiled
+from sinks import ResultSink
+from stats import SimulationStats
 
 
 # TODO
 # 1. DONE Make all rules truly configurable
 #    - With exception to re-split, surrender and insurance
 # 2. Move classes to separate files
-# 3. Add cut card
+# 3. DONE Add cut card
 # 4. Add rules to config file
-# 5. Add card counting config
-# 6. Hook up into martingale simulator
+# 5. DONE Add card counting config
+# 6. DONE Hook up into martingale simulator
 # 7. Documentation and clean up
 # 8. Make this user playable
 # 9. Make a GUI for this
@@ -39,6 +46,16 @@ class GameState(Enum):
     NOT_PLAYING      = 5 # The default state
 
 
+class Verbosity(Enum):
+    '''
+    Enum which models how much a run prints.
+    '''
+    SILENT  = 0 # Nothing at all
+    SUMMARY = 1 # Only the end of run results
+    SAMPLED = 2 # The results plus every Nth hand
+    FULL    = 3 # Every hand
+
+
 class PlayerAction(Enum):
     '''
     Enum which models a potential player action.
@@ -62,6 +79,7 @@ class Rules:
     allow_surrender:   bool
     allow_insurance:   bool
     dealer_stand:      DealerStand
+    penetration:       float = 0.8 # Fraction of the shoe dealt before the cut card comes out
 
 
 class CardType(Enum):
@@ -89,55 +107,120 @@ class CardValue(Enum):
     KING  = 13
 
 
-@dataclass
 class Card:
-    card_type:  CardType
-    card_value: CardValue
+    '''
+    An immutable, interned playing card.
+    Card(card_type, card_value) always returns the same instance for the same card,
+    so cards compare by identity and their values are worked out once.
+    '''
+    __slots__ = ('card_type', 'card_value', 'rank', 'card_values')
+    _interned = {}
+
+    def __new__(cls, card_type : CardType, card_value : CardValue) -> 'Card':
+        card = cls._interned.get((card_type, card_value))
+        if card is None:
+            card = object.__new__(cls)
+            rank = card_value.value
+            object.__setattr__(card, 'card_type', card_type)
+            object.__setattr__(card, 'card_value', card_value)
+            object.__setattr__(card, 'rank', rank)
+            object.__setattr__(card, 'card_values', (HARD_VALUES[rank], SOFT_VALUES[rank]))
+            cls._interned[(card_type, card_value)] = card
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Cards are immutable.')
+
+    def __reduce__(self):
+        return Card, (self.card_type, self.card_value)
+
+    def __repr__(self) -> str:
+        return f'Card({self.card_type}, {self.card_value})'
 
     def __str__(self) -> str:
         return f'{self.card_value.name} OF {self.card_type.name}'
 
-    def __eq__(self, value):
-        return self.card_type == value.card_type and self.card_value == value.card_value
+    def values(self) -> tuple:
+        return self.card_values
 
-    def values(self) -> list:
-        hard_value = self.card_value.value if self.card_value.value < 10 else 10
-        soft_value = hard_value if self.card_value is not CardValue.ACE else 11
-        return [ hard_value, soft_value ]
+
+# The base bet. Stats are reported in units of it.
+#
+BASE_BET = 100
+
+# Hands between checkpoints, when a run is checkpointed.
+#
+CHECKPOINT_EVERY = 100_000
+
+
+# Card values indexed by rank code (CardValue.value).
+# Ranks are what the shoe stores, so hands and the book never need a Card object.
+#
+HARD_VALUES = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10)
+SOFT_VALUES = (0, 11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10)
 
 
 class Deck:
-    def __init__(self, num_decks = 0):
-        self.cards = []
+    '''
+    A shoe of num_decks decks stored as a uint8 array of rank codes.
+    Cards are drawn by advancing a cursor, and shuffling permutes the array in place.
+
+    The storage is laid out as [discard pile | cards in play | cards left to deal].
+    discard_round moves the cards in play onto the discard pile, and once the cut card
+    has come out the whole storage is shuffled back into a fresh shoe.
+    '''
+    def __init__(self, num_decks = 0, rng : np.random.Generator = None, penetration : float = 1.0):
         self.num_decks = num_decks
-        for _ in range(self.num_decks):
-            self.add_new_deck()
+        self.rng       = rng if rng is not None else np.random.default_rng()
+        self.cards     = np.tile(DECK_RANKS, num_decks)
+        self.cut_card  = int(len(self.cards) * penetration)
+        self.cursor    = 0
+        self.discarded = 0 # Cards before this index are on the discard pile
         self.shuffle()
 
-    def cards(self) -> list:
-        return self.cards
+    def __len__(self) -> int:
+        return len(self.cards) - self.cursor
 
-    def add_new_deck(self) -> None:
-        self.cards.extend(self.deck_of_cards())
+    def shuffle(self) -> None:
+        '''
+        Shuffles every card, including the discard pile, back into the shoe.
+        '''
+        self.rng.shuffle(self.cards)
+        self.cursor    = 0
+        self.discarded = 0
 
-    def append(self, card : Card) -> None:
-        self.cards.append(card)
+    def discard_pile(self) -> np.ndarray:
+        return self.cards[:self.discarded]
 
-    def shuffle(self) -> None:
-        random.shuffle(self.cards)
+    def discard_round(self) -> None:
+        '''
+        Moves the cards dealt this round onto the discard pile.
+        '''
+        self.discarded = self.cursor
 
-    def reset(self) -> None:
-        self.cards = []
+    def reached_cut_card(self) -> bool:
+        return self.cursor >= self.cut_card
 
-    def draw_card(self) -> Card:
-        if not self.cards:
-            # TODO: Do proper cutting with the cut card
-            self.cards = []
-            for _ in range(self.num_decks):
-                self.add_new_deck()
-            self.shuffle()
-            
-        return self.cards.pop()
+    def reshuffle_discards(self) -> None:
+        '''
+        Called when the shoe runs dry mid round.
+        The cards in play move to the front and the discard pile behind them is shuffled into a new shoe.
+        '''
+        assert self.discarded > 0, 'Error: The shoe and discard pile are both empty.'
+        in_play = self.cards[self.discarded:self.cursor].copy()
+        self.cards[len(in_play):] = self.cards[:self.discarded]
+        self.cards[:len(in_play)] = in_play
+        self.rng.shuffle(self.cards[len(in_play):])
+        self.cursor    = len(in_play)
+        self.discarded = 0
+
+    def draw_card(self) -> int:
+        if self.cursor == len(self.cards):
+            self.reshuffle_discards()
+
+        card = self.cards.item(self.cursor)
+        self.cursor += 1
+        return card
 
     @staticmethod
     def deck_of_cards() -> list:
@@ -149,19 +232,29 @@ class Deck:
         return deck
 
 
+DECK_RANKS = np.array([ card.rank for card in Deck.deck_of_cards() ], dtype=np.uint8)
+
+
 class Hand:
+    '''
+    A hand of rank codes.
+    The totals and pair flag are kept up to date by add_card so the hot path never rescans the cards.
+    soft_total counts one ace as 11 when that doesn't bust the hand, otherwise it equals hard_total.
+    '''
+    __slots__ = ('cards', 'bet_size', 'result', 'net', 'hard_total', 'soft_total', 'has_ace', 'is_pair')
+
     def __init__(self) -> None:
-        self.cards    = []
-        self.bet_size = 100
-        self.result   = False
+        self.cards      = []
+        self.bet_size   = BASE_BET
+        self.result     = False
+        self.net        = 0
+        self.hard_total = 0
+        self.soft_total = 0
+        self.has_ace    = False
+        self.is_pair    = False
 
     def __str__(self) -> str:
-        res = ''
-        for i, card in enumerate(self.cards):
-            res += str(card)
-            if i < len(self.cards) - 1:
-                res += ', '
-        return res
+        return ', '.join(CardValue(card).name for card in self.cards)
 
     def num_cards(self) -> int:
         return len(self.cards)
@@ -169,41 +262,38 @@ class Hand:
     def double_down(self) -> None:
         self.bet_size *= 2
 
-    def add_card(self, card : Card) -> None:
-        self.cards.append(card)
-
-    def face_card(self) -> Card:
+    def add_card(self, card : int) -> None:
+        cards = self.cards
+        cards.append(card)
+        hard_total = self.hard_total + HARD_VALUES[card]
+        if card == 1:
+            self.has_ace = True
+        self.hard_total = hard_total
+        self.soft_total = hard_total + 10 if self.has_ace and hard_total <= 11 else hard_total
+        self.is_pair    = len(cards) == 2 and cards[0] == card
+
+    def face_card(self) -> int:
         return self.cards[0]
 
     def can_be_split(self) -> bool:
-        if len(self.cards) != 2:
-            return False
-        return self.cards[0].card_value == self.cards[1].card_value
+        return self.is_pair
 
-    def split_card(self) -> Card:
+    def split_card(self) -> int:
         if not self.can_be_split():
             return None
         return self.cards[0]
 
-    def totals(self) -> list:
-        totals = [0, 0]
-        for card in self.cards:
-            card_values = card.values()
-            totals[0] += card_values[0]
-            totals[1] += card_values[1]
-        return totals
+    def totals(self) -> tuple:
+        return self.hard_total, self.soft_total
+
+    def is_soft(self) -> bool:
+        return self.soft_total != self.hard_total
 
     def is_bust(self) -> bool:
-        totals = self.totals()
-        return totals[0] > 21 and totals[1] > 21
+        return self.hard_total > 21
 
     def best_total(self) -> int:
-        if self.is_bust():
-            return 0
-        totals = self.totals()
-        max_total = max(totals[0], totals[1])
-        min_total = min(totals[0], totals[1])
-        return max_total if max_total <= 21 else min_total
+        return 0 if self.hard_total > 21 else self.soft_total
 
     def set_result(self, result) -> None:
         self.result = result
@@ -216,586 +306,646 @@ class Hand:
         return f'H:{totals[0]} S:{totals[1]}'
 
 
+# The basic strategy charts, keyed by player total (or pair card) and then dealer face card.
+# These are only read once, by compile_book().
+#
+HARD_BOOK = {
+    2 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.HIT,
+        CardValue.FIVE  : PlayerAction.HIT,
+        CardValue.SIX   : PlayerAction.HIT,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    3 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.HIT,
+        CardValue.FIVE  : PlayerAction.HIT,
+        CardValue.SIX   : PlayerAction.HIT,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    4 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.HIT,
+        CardValue.FIVE  : PlayerAction.HIT,
+        CardValue.SIX   : PlayerAction.HIT,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    5 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.HIT,
+        CardValue.FIVE  : PlayerAction.HIT,
+        CardValue.SIX   : PlayerAction.HIT,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    6 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.HIT,
+        CardValue.FIVE  : PlayerAction.HIT,
+        CardValue.SIX   : PlayerAction.HIT,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    7 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.HIT,
+        CardValue.FIVE  : PlayerAction.HIT,
+        CardValue.SIX   : PlayerAction.HIT,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    8 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.HIT,
+        CardValue.FIVE  : PlayerAction.HIT,
+        CardValue.SIX   : PlayerAction.HIT,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    9 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.DOUBLE_DOWN,
+        CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
+        CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    10 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.DOUBLE_DOWN,
+        CardValue.THREE : PlayerAction.DOUBLE_DOWN,
+        CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
+        CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
+        CardValue.SEVEN : PlayerAction.DOUBLE_DOWN,
+        CardValue.EIGHT : PlayerAction.DOUBLE_DOWN,
+        CardValue.NINE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    11 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.DOUBLE_DOWN,
+        CardValue.THREE : PlayerAction.DOUBLE_DOWN,
+        CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
+        CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
+        CardValue.SEVEN : PlayerAction.DOUBLE_DOWN,
+        CardValue.EIGHT : PlayerAction.DOUBLE_DOWN,
+        CardValue.NINE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.TEN   : PlayerAction.DOUBLE_DOWN,
+        CardValue.JACK  : PlayerAction.DOUBLE_DOWN,
+        CardValue.QUEEN : PlayerAction.DOUBLE_DOWN,
+        CardValue.KING  : PlayerAction.DOUBLE_DOWN
+    },
+    12 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    13 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.STAND,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    14 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.STAND,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    15 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.STAND,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    16 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.STAND,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    17 : {
+        CardValue.ACE   : PlayerAction.STAND,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.STAND,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.STAND,
+        CardValue.EIGHT : PlayerAction.STAND,
+        CardValue.NINE  : PlayerAction.STAND,
+        CardValue.TEN   : PlayerAction.STAND,
+        CardValue.JACK  : PlayerAction.STAND,
+        CardValue.QUEEN : PlayerAction.STAND,
+        CardValue.KING  : PlayerAction.STAND
+    },
+    18 : {
+        CardValue.ACE   : PlayerAction.STAND,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.STAND,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.STAND,
+        CardValue.EIGHT : PlayerAction.STAND,
+        CardValue.NINE  : PlayerAction.STAND,
+        CardValue.TEN   : PlayerAction.STAND,
+        CardValue.JACK  : PlayerAction.STAND,
+        CardValue.QUEEN : PlayerAction.STAND,
+        CardValue.KING  : PlayerAction.STAND
+    },
+    19 : {
+        CardValue.ACE   : PlayerAction.STAND,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.STAND,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.STAND,
+        CardValue.EIGHT : PlayerAction.STAND,
+        CardValue.NINE  : PlayerAction.STAND,
+        CardValue.TEN   : PlayerAction.STAND,
+        CardValue.JACK  : PlayerAction.STAND,
+        CardValue.QUEEN : PlayerAction.STAND,
+        CardValue.KING  : PlayerAction.STAND
+    },
+    20 : {
+        CardValue.ACE   : PlayerAction.STAND,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.STAND,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.STAND,
+        CardValue.EIGHT : PlayerAction.STAND,
+        CardValue.NINE  : PlayerAction.STAND,
+        CardValue.TEN   : PlayerAction.STAND,
+        CardValue.JACK  : PlayerAction.STAND,
+        CardValue.QUEEN : PlayerAction.STAND,
+        CardValue.KING  : PlayerAction.STAND
+    },
+    21 : {
+        CardValue.ACE   : PlayerAction.STAND,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.STAND,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.STAND,
+        CardValue.EIGHT : PlayerAction.STAND,
+        CardValue.NINE  : PlayerAction.STAND,
+        CardValue.TEN   : PlayerAction.STAND,
+        CardValue.JACK  : PlayerAction.STAND,
+        CardValue.QUEEN : PlayerAction.STAND,
+        CardValue.KING  : PlayerAction.STAND
+    }
+}
+
+
+SOFT_BOOK = {
+    13 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.HIT,
+        CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    14 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.HIT,
+        CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    15 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
+        CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    16 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
+        CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    17 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.DOUBLE_DOWN,
+        CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
+        CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    18 : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.DOUBLE_DOWN,
+        CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
+        CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
+        CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
+        CardValue.SEVEN : PlayerAction.STAND,
+        CardValue.EIGHT : PlayerAction.STAND,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    19 : {
+        CardValue.ACE   : PlayerAction.STAND,
+        CardValue.TWO   : PlayerAction.STAND,
+        CardValue.THREE : PlayerAction.STAND,
+        CardValue.FOUR  : PlayerAction.STAND,
+        CardValue.FIVE  : PlayerAction.STAND,
+        CardValue.SIX   : PlayerAction.STAND,
+        CardValue.SEVEN : PlayerAction.STAND,
+        CardValue.EIGHT : PlayerAction.STAND,
+        CardValue.NINE  : PlayerAction.STAND,
+        CardValue.TEN   : PlayerAction.STAND,
+        CardValue.JACK  : PlayerAction.STAND,
+        CardValue.QUEEN : PlayerAction.STAND,
+        CardValue.KING  : PlayerAction.STAND
+    }
+}
+
+
+SPLIT_BOOK = {
+    CardValue.ACE : {
+        CardValue.ACE   : PlayerAction.SPLIT,
+        CardValue.TWO   : PlayerAction.SPLIT,
+        CardValue.THREE : PlayerAction.SPLIT,
+        CardValue.FOUR  : PlayerAction.SPLIT,
+        CardValue.FIVE  : PlayerAction.SPLIT,
+        CardValue.SIX   : PlayerAction.SPLIT,
+        CardValue.SEVEN : PlayerAction.SPLIT,
+        CardValue.EIGHT : PlayerAction.SPLIT,
+        CardValue.NINE  : PlayerAction.SPLIT,
+        CardValue.TEN   : PlayerAction.SPLIT,
+        CardValue.JACK  : PlayerAction.SPLIT,
+        CardValue.QUEEN : PlayerAction.SPLIT,
+        CardValue.KING  : PlayerAction.SPLIT
+    },
+    CardValue.TWO : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.SPLIT,
+        CardValue.THREE : PlayerAction.SPLIT,
+        CardValue.FOUR  : PlayerAction.SPLIT,
+        CardValue.FIVE  : PlayerAction.SPLIT,
+        CardValue.SIX   : PlayerAction.SPLIT,
+        CardValue.SEVEN : PlayerAction.SPLIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    CardValue.THREE : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.SPLIT,
+        CardValue.THREE : PlayerAction.SPLIT,
+        CardValue.FOUR  : PlayerAction.SPLIT,
+        CardValue.FIVE  : PlayerAction.SPLIT,
+        CardValue.SIX   : PlayerAction.SPLIT,
+        CardValue.SEVEN : PlayerAction.SPLIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    CardValue.FOUR : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.HIT,
+        CardValue.THREE : PlayerAction.HIT,
+        CardValue.FOUR  : PlayerAction.HIT,
+        CardValue.FIVE  : PlayerAction.SPLIT,
+        CardValue.SIX   : PlayerAction.SPLIT,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    # FIVE IS A NEVER SPLIT
+    CardValue.SIX : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.SPLIT,
+        CardValue.THREE : PlayerAction.SPLIT,
+        CardValue.FOUR  : PlayerAction.SPLIT,
+        CardValue.FIVE  : PlayerAction.SPLIT,
+        CardValue.SIX   : PlayerAction.SPLIT,
+        CardValue.SEVEN : PlayerAction.HIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    CardValue.SEVEN : {
+        CardValue.ACE   : PlayerAction.HIT,
+        CardValue.TWO   : PlayerAction.SPLIT,
+        CardValue.THREE : PlayerAction.SPLIT,
+        CardValue.FOUR  : PlayerAction.SPLIT,
+        CardValue.FIVE  : PlayerAction.SPLIT,
+        CardValue.SIX   : PlayerAction.SPLIT,
+        CardValue.SEVEN : PlayerAction.SPLIT,
+        CardValue.EIGHT : PlayerAction.HIT,
+        CardValue.NINE  : PlayerAction.HIT,
+        CardValue.TEN   : PlayerAction.HIT,
+        CardValue.JACK  : PlayerAction.HIT,
+        CardValue.QUEEN : PlayerAction.HIT,
+        CardValue.KING  : PlayerAction.HIT
+    },
+    CardValue.EIGHT : {
+        CardValue.ACE   : PlayerAction.SPLIT,
+        CardValue.TWO   : PlayerAction.SPLIT,
+        CardValue.THREE : PlayerAction.SPLIT,
+        CardValue.FOUR  : PlayerAction.SPLIT,
+        CardValue.FIVE  : PlayerAction.SPLIT,
+        CardValue.SIX   : PlayerAction.SPLIT,
+        CardValue.SEVEN : PlayerAction.SPLIT,
+        CardValue.EIGHT : PlayerAction.SPLIT,
+        CardValue.NINE  : PlayerAction.SPLIT,
+        CardValue.TEN   : PlayerAction.SPLIT,
+        CardValue.JACK  : PlayerAction.SPLIT,
+        CardValue.QUEEN : PlayerAction.SPLIT,
+        CardValue.KING  : PlayerAction.SPLIT
+    },
+    CardValue.NINE : {
+        CardValue.ACE   : PlayerAction.STAND,
+        CardValue.TWO   : PlayerAction.SPLIT,
+        CardValue.THREE : PlayerAction.SPLIT,
+        CardValue.FOUR  : PlayerAction.SPLIT,
+        CardValue.FIVE  : PlayerAction.SPLIT,
+        CardValue.SIX   : PlayerAction.SPLIT,
+        CardValue.SEVEN : PlayerAction.SPLIT,
+        CardValue.EIGHT : PlayerAction.SPLIT,
+        CardValue.NINE  : PlayerAction.SPLIT,
+        CardValue.TEN   : PlayerAction.STAND,
+        CardValue.JACK  : PlayerAction.STAND,
+        CardValue.QUEEN : PlayerAction.STAND,
+        CardValue.KING  : PlayerAction.STAND
+    }
+    # TEN IS A NEVER SPLIT
+}
+
+
+# Layout of the compiled book.
+# A hand state is one of 55 rows: hard totals, soft totals (offset by SOFT_STATE),
+# or splittable pairs keyed by card value (offset by PAIR_STATE).
+# Each row has one column per dealer face card rank code, so a decision is
+# book[state * NUM_RANKS + face_card].
+#
+NUM_RANKS   = len(CardValue)
+HARD_STATE  = 0
+SOFT_STATE  = 22
+PAIR_STATE  = 44
+NUM_STATES  = 55
+
+
+def compile_book(hard_book : dict, soft_book : dict, split_book : dict) -> tuple:
+    '''
+    Flattens the hard, soft and split charts into one immutable tuple of PlayerActions.
+    Soft and hard totals missing from the charts are filled in with the obvious play,
+    and pairs missing from the split chart are played as their hard total.
+    '''
+    book = [ PlayerAction.HIT ] * (NUM_STATES * NUM_RANKS)
+
+    def fill(state : int, row : dict) -> None:
+        for face_value, action in row.items():
+            book[state * NUM_RANKS + face_value.value] = action
+
+    stand_row = { face_value : PlayerAction.STAND for face_value in CardValue }
+    for total in range(22):
+        fill(HARD_STATE + total, hard_book.get(total, stand_row if total > 11 else {}))
+        fill(SOFT_STATE + total, soft_book.get(total, stand_row if total > 19 else {}))
+    for value in range(1, 11):
+        split_row = split_book.get(CardValue(value))
+        fill(PAIR_STATE + value, split_row if split_row is not None else hard_book[value * 2])
+
+    return tuple(book)
+
+
+def _default_book() -> tuple:
+    '''
+    The compiled default charts. Built once per process and shared by every seat.
+    '''
+    global DEFAULT_BOOK
+    if DEFAULT_BOOK is None:
+        DEFAULT_BOOK = compile_book(HARD_BOOK, SOFT_BOOK, SPLIT_BOOK)
+    return DEFAULT_BOOK
+
+
+DEFAULT_BOOK = None
+
 
 class TheBook:
     '''
     Class Modelling a the blackjack book.
     '''
-    def __init__(self, rules : Rules):
+    def __init__(self, rules : Rules, book : tuple = None):
         self.rules = rules
+        self.book  = book if book is not None else _default_book()
+
+    @classmethod
+    def from_charts(cls, rules : Rules, hard_book : dict, soft_book : dict, split_book : dict) -> 'TheBook':
+        '''
+        Builds a book from charts laid out like HARD_BOOK, SOFT_BOOK and SPLIT_BOOK.
+        '''
+        return cls(rules, compile_book(hard_book, soft_book, split_book))
+
+    @staticmethod
+    def hand_state(hand : Hand, has_split : bool) -> int:
+        '''
+        Maps a hand to its row in the compiled book.
+        '''
+        if hand.is_pair and not has_split:
+            return PAIR_STATE + HARD_VALUES[hand.cards[0]]
+        if hand.soft_total != hand.hard_total:
+            return SOFT_STATE + hand.soft_total
+        return HARD_STATE + hand.hard_total
 
-        self.hard_book = {
-            2 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.HIT,
-                CardValue.FIVE  : PlayerAction.HIT,
-                CardValue.SIX   : PlayerAction.HIT,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            3 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.HIT,
-                CardValue.FIVE  : PlayerAction.HIT,
-                CardValue.SIX   : PlayerAction.HIT,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            4 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.HIT,
-                CardValue.FIVE  : PlayerAction.HIT,
-                CardValue.SIX   : PlayerAction.HIT,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            5 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.HIT,
-                CardValue.FIVE  : PlayerAction.HIT,
-                CardValue.SIX   : PlayerAction.HIT,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            6 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.HIT,
-                CardValue.FIVE  : PlayerAction.HIT,
-                CardValue.SIX   : PlayerAction.HIT,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            7 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.HIT,
-                CardValue.FIVE  : PlayerAction.HIT,
-                CardValue.SIX   : PlayerAction.HIT,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            8 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.HIT,
-                CardValue.FIVE  : PlayerAction.HIT,
-                CardValue.SIX   : PlayerAction.HIT,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            9 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.DOUBLE_DOWN,
-                CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
-                CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            10 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.DOUBLE_DOWN,
-                CardValue.THREE : PlayerAction.DOUBLE_DOWN,
-                CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
-                CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
-                CardValue.SEVEN : PlayerAction.DOUBLE_DOWN,
-                CardValue.EIGHT : PlayerAction.DOUBLE_DOWN,
-                CardValue.NINE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            11 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.DOUBLE_DOWN,
-                CardValue.THREE : PlayerAction.DOUBLE_DOWN,
-                CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
-                CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
-                CardValue.SEVEN : PlayerAction.DOUBLE_DOWN,
-                CardValue.EIGHT : PlayerAction.DOUBLE_DOWN,
-                CardValue.NINE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.TEN   : PlayerAction.DOUBLE_DOWN,
-                CardValue.JACK  : PlayerAction.DOUBLE_DOWN,
-                CardValue.QUEEN : PlayerAction.DOUBLE_DOWN,
-                CardValue.KING  : PlayerAction.DOUBLE_DOWN
-            },
-            12 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            13 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.STAND,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            14 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.STAND,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            15 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.STAND,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            16 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.STAND,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            17 : {
-                CardValue.ACE   : PlayerAction.STAND,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.STAND,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.STAND,
-                CardValue.EIGHT : PlayerAction.STAND,
-                CardValue.NINE  : PlayerAction.STAND,
-                CardValue.TEN   : PlayerAction.STAND,
-                CardValue.JACK  : PlayerAction.STAND,
-                CardValue.QUEEN : PlayerAction.STAND,
-                CardValue.KING  : PlayerAction.STAND
-            },
-            18 : {
-                CardValue.ACE   : PlayerAction.STAND,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.STAND,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.STAND,
-                CardValue.EIGHT : PlayerAction.STAND,
-                CardValue.NINE  : PlayerAction.STAND,
-                CardValue.TEN   : PlayerAction.STAND,
-                CardValue.JACK  : PlayerAction.STAND,
-                CardValue.QUEEN : PlayerAction.STAND,
-                CardValue.KING  : PlayerAction.STAND
-            },
-            19 : {
-                CardValue.ACE   : PlayerAction.STAND,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.STAND,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.STAND,
-                CardValue.EIGHT : PlayerAction.STAND,
-                CardValue.NINE  : PlayerAction.STAND,
-                CardValue.TEN   : PlayerAction.STAND,
-                CardValue.JACK  : PlayerAction.STAND,
-                CardValue.QUEEN : PlayerAction.STAND,
-                CardValue.KING  : PlayerAction.STAND
-            },
-            20 : {
-                CardValue.ACE   : PlayerAction.STAND,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.STAND,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.STAND,
-                CardValue.EIGHT : PlayerAction.STAND,
-                CardValue.NINE  : PlayerAction.STAND,
-                CardValue.TEN   : PlayerAction.STAND,
-                CardValue.JACK  : PlayerAction.STAND,
-                CardValue.QUEEN : PlayerAction.STAND,
-                CardValue.KING  : PlayerAction.STAND
-            },
-            21 : {
-                CardValue.ACE   : PlayerAction.STAND,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.STAND,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.STAND,
-                CardValue.EIGHT : PlayerAction.STAND,
-                CardValue.NINE  : PlayerAction.STAND,
-                CardValue.TEN   : PlayerAction.STAND,
-                CardValue.JACK  : PlayerAction.STAND,
-                CardValue.QUEEN : PlayerAction.STAND,
-                CardValue.KING  : PlayerAction.STAND
-            }
-        }
-
-        self.soft_book = {
-            13 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.HIT,
-                CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            14 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.HIT,
-                CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            15 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
-                CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            16 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
-                CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            17 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.DOUBLE_DOWN,
-                CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
-                CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            18 : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.DOUBLE_DOWN,
-                CardValue.FOUR  : PlayerAction.DOUBLE_DOWN,
-                CardValue.FIVE  : PlayerAction.DOUBLE_DOWN,
-                CardValue.SIX   : PlayerAction.DOUBLE_DOWN,
-                CardValue.SEVEN : PlayerAction.STAND,
-                CardValue.EIGHT : PlayerAction.STAND,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            19 : {
-                CardValue.ACE   : PlayerAction.STAND,
-                CardValue.TWO   : PlayerAction.STAND,
-                CardValue.THREE : PlayerAction.STAND,
-                CardValue.FOUR  : PlayerAction.STAND,
-                CardValue.FIVE  : PlayerAction.STAND,
-                CardValue.SIX   : PlayerAction.STAND,
-                CardValue.SEVEN : PlayerAction.STAND,
-                CardValue.EIGHT : PlayerAction.STAND,
-                CardValue.NINE  : PlayerAction.STAND,
-                CardValue.TEN   : PlayerAction.STAND,
-                CardValue.JACK  : PlayerAction.STAND,
-                CardValue.QUEEN : PlayerAction.STAND,
-                CardValue.KING  : PlayerAction.STAND
-            }
-        }
-
-        self.split_book = {
-            CardValue.ACE : {
-                CardValue.ACE   : PlayerAction.SPLIT,
-                CardValue.TWO   : PlayerAction.SPLIT,
-                CardValue.THREE : PlayerAction.SPLIT,
-                CardValue.FOUR  : PlayerAction.SPLIT,
-                CardValue.FIVE  : PlayerAction.SPLIT,
-                CardValue.SIX   : PlayerAction.SPLIT,
-                CardValue.SEVEN : PlayerAction.SPLIT,
-                CardValue.EIGHT : PlayerAction.SPLIT,
-                CardValue.NINE  : PlayerAction.SPLIT,
-                CardValue.TEN   : PlayerAction.SPLIT,
-                CardValue.JACK  : PlayerAction.SPLIT,
-                CardValue.QUEEN : PlayerAction.SPLIT,
-                CardValue.KING  : PlayerAction.SPLIT
-            },
-            CardValue.TWO : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.SPLIT,
-                CardValue.THREE : PlayerAction.SPLIT,
-                CardValue.FOUR  : PlayerAction.SPLIT,
-                CardValue.FIVE  : PlayerAction.SPLIT,
-                CardValue.SIX   : PlayerAction.SPLIT,
-                CardValue.SEVEN : PlayerAction.SPLIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            CardValue.THREE : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.SPLIT,
-                CardValue.THREE : PlayerAction.SPLIT,
-                CardValue.FOUR  : PlayerAction.SPLIT,
-                CardValue.FIVE  : PlayerAction.SPLIT,
-                CardValue.SIX   : PlayerAction.SPLIT,
-                CardValue.SEVEN : PlayerAction.SPLIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            CardValue.FOUR : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.HIT,
-                CardValue.THREE : PlayerAction.HIT,
-                CardValue.FOUR  : PlayerAction.HIT,
-                CardValue.FIVE  : PlayerAction.SPLIT,
-                CardValue.SIX   : PlayerAction.SPLIT,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            # FIVE IS A NEVER SPLIT
-            CardValue.SIX : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.SPLIT,
-                CardValue.THREE : PlayerAction.SPLIT,
-                CardValue.FOUR  : PlayerAction.SPLIT,
-                CardValue.FIVE  : PlayerAction.SPLIT,
-                CardValue.SIX   : PlayerAction.SPLIT,
-                CardValue.SEVEN : PlayerAction.HIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            CardValue.SEVEN : {
-                CardValue.ACE   : PlayerAction.HIT,
-                CardValue.TWO   : PlayerAction.SPLIT,
-                CardValue.THREE : PlayerAction.SPLIT,
-                CardValue.FOUR  : PlayerAction.SPLIT,
-                CardValue.FIVE  : PlayerAction.SPLIT,
-                CardValue.SIX   : PlayerAction.SPLIT,
-                CardValue.SEVEN : PlayerAction.SPLIT,
-                CardValue.EIGHT : PlayerAction.HIT,
-                CardValue.NINE  : PlayerAction.HIT,
-                CardValue.TEN   : PlayerAction.HIT,
-                CardValue.JACK  : PlayerAction.HIT,
-                CardValue.QUEEN : PlayerAction.HIT,
-                CardValue.KING  : PlayerAction.HIT
-            },
-            CardValue.EIGHT : {
-                CardValue.ACE   : PlayerAction.SPLIT,
-                CardValue.TWO   : PlayerAction.SPLIT,
-                CardValue.THREE : PlayerAction.SPLIT,
-                CardValue.FOUR  : PlayerAction.SPLIT,
-                CardValue.FIVE  : PlayerAction.SPLIT,
-                CardValue.SIX   : PlayerAction.SPLIT,
-                CardValue.SEVEN : PlayerAction.SPLIT,
-                CardValue.EIGHT : PlayerAction.SPLIT,
-                CardValue.NINE  : PlayerAction.SPLIT,
-                CardValue.TEN   : PlayerAction.SPLIT,
-                CardValue.JACK  : PlayerAction.SPLIT,
-                CardValue.QUEEN : PlayerAction.SPLIT,
-                CardValue.KING  : PlayerAction.SPLIT
-            },
-            CardValue.NINE : {
-                CardValue.ACE   : PlayerAction.STAND,
-                CardValue.TWO   : PlayerAction.SPLIT,
-                CardValue.THREE : PlayerAction.SPLIT,
-                CardValue.FOUR  : PlayerAction.SPLIT,
-                CardValue.FIVE  : PlayerAction.SPLIT,
-                CardValue.SIX   : PlayerAction.SPLIT,
-                CardValue.SEVEN : PlayerAction.SPLIT,
-                CardValue.EIGHT : PlayerAction.SPLIT,
-                CardValue.NINE  : PlayerAction.SPLIT,
-                CardValue.TEN   : PlayerAction.STAND,
-                CardValue.JACK  : PlayerAction.STAND,
-                CardValue.QUEEN : PlayerAction.STAND,
-                CardValue.KING  : PlayerAction.STAND
-            }
-            # TEN IS A NEVER SPLIT
-        }
-
-    def player_best_move(self, hand : Hand, face_card : Card, has_split : bool) -> PlayerAction:
-        hard_value, soft_value = hand.totals()
-
-        if hard_value <= 1:
-            temp = 1
-
-        hard_best_move  = self.hard_book[hard_value][face_card.card_value] if hard_value <= 21 else None
-        soft_best_move  = self.hard_book[soft_value][face_card.card_value] if soft_value <= 21 else None
-        split_best_move = None
-        if not has_split and hand.can_be_split() and hand.split_card().card_value in self.split_book:
-                split_best_move = self.split_book[hand.split_card().card_value][face_card.card_value]
-
-        if split_best_move is not None:  return split_best_move
-        elif soft_best_move is not None: return soft_best_move
-        elif hard_best_move is not None: return hard_best_move
-        assert False, 'SHOULD NEVER REACH HERE'
-        return None
+    def lookup(self, state : int, face_card : int) -> PlayerAction:
+        return self.book[state * NUM_RANKS + face_card]
+
+    def player_best_move(self, hand : Hand, face_card : int, has_split : bool) -> PlayerAction:
+        return self.book[self.hand_state(hand, has_split) * NUM_RANKS + face_card]
 
     def dealer_best_move(self, hand : Hand) -> PlayerAction:
-        hard_value, soft_value = hand.totals()
-        if self.rules.dealer_stand is DealerStand.HIT_SOFT_SEVENTEEN and hard_value < soft_value:
-            return PlayerAction.STAND if soft_value > 17 else PlayerAction.HIT
-        else:
-            return PlayerAction.STAND if soft_value >= 17 else PlayerAction.HIT
+        soft_value = hand.soft_total
+        if soft_value == 17 and hand.hard_total < 17 and self.rules.dealer_stand is DealerStand.HIT_SOFT_SEVENTEEN:
+            return PlayerAction.HIT
+        return PlayerAction.STAND if soft_value >= 17 else PlayerAction.HIT
 
 
 class Player:
     '''
     Class Modelling a Black Jack Player.
     '''
-    def __init__(self, rules : Rules) -> None:
+    def __init__(self, rules : Rules, book : 'TheBook' = None) -> None:
         '''
         Constructor.
         '''
         self.rules     = rules
-        self.book      = TheBook(self.rules)
+        self.book      = book if book is not None else TheBook(self.rules)
         self.money     = 0
         self.reset()
 
@@ -810,10 +960,10 @@ class Player:
         Resets the player.
         '''
         self.hands     = [ Hand() ]
-        self.bet_size  = 100
+        self.bet_size  = BASE_BET
         self.has_split = False
 
-    def add_card(self, card : Card) -> None:
+    def add_card(self, card : int) -> None:
         '''
         Adds a card to our hand.
         Method should only be called when no split has occurred.
@@ -821,23 +971,25 @@ class Player:
         assert len(self.hands) == 1, f'Error: A split has occurred.: {len(self.hands)}'
         self.hands[0].add_card(card)
 
-    def perform_actions(self, face_card : Card, shoe : Deck) -> None:
+    def perform_actions(self, face_card : int, shoe : Deck) -> None:
         '''
         Usually just does one perform_action call.
         However, if we split we have to play multiple hands.
         '''
-        player_action = self.perform_action(self.hands[0], face_card, shoe)
+        if self.perform_action(self.hands[0], face_card, shoe) is PlayerAction.STAND:
+            return
         for hand in self.hands:
+            player_action = PlayerAction.INITIAL
             while player_action is not PlayerAction.STAND:
                 player_action = self.perform_action(hand, face_card, shoe)
 
-    def perform_action(self, hand : Hand, face_card : Card, shoe : Deck) -> PlayerAction:
+    def perform_action(self, hand : Hand, face_card : int, shoe : Deck) -> PlayerAction:
         '''
         Queries the blackjack book for the best move.
         Then performs that move.
         Only HIT, STAND, DOUBLE_DOWN, and SPLIT are supported.
         '''
-        if hand.is_bust():
+        if hand.hard_total > 21:
             return PlayerAction.STAND
 
         player_action = self.book.player_best_move(hand, face_card, self.has_split)
@@ -881,49 +1033,62 @@ class Player:
         Splits the hand.
         '''
         self.has_split = True
-        card = self.hands[0].split_card()
-        self.hands.clear()
-        for i in range(2):
-            self.hands.append(Hand())
-            self.hands[i].add_card(card)
-            self.hands[i].add_card(shoe.draw_card())
+        card = hand.split_card()
+        self.hands = [ Hand(), Hand() ]
+        for split_hand in self.hands:
+            split_hand.bet_size = self.bet_size
+            split_hand.add_card(card)
+            split_hand.add_card(shoe.draw_card())
 
         return PlayerAction.SPLIT
 
-    def won_or_lost(self, dealer_total : int) -> None:
+    def won_or_lost(self, dealer_total : int, dealer_blackjack : bool, stats : SimulationStats) -> float:
         '''
         If the player won, increment their money by the bet.
         If the player lost, decrement their money by the bet.
+        A blackjack is an unsplit two card 21, and only a dealer blackjack pushes it.
+        Hand outcomes are counted in stats, and the round's net is returned in units of the base bet.
         '''
-        global num_hands
-        global num_hands_won
-
+        round_net = 0
         for hand in self.hands:
-            num_hands += 1
-            self.num_hands += 1
-            total = hand.best_total()
+            stats.num_hands += 1
+            self.num_hands  += 1
+            total     = hand.best_total()
+            bet       = hand.bet_size
+            blackjack = total == 21 and len(hand.cards) == 2 and not self.has_split
             if total == 0: # bust
                 hand.set_result(False)
-                self.money -= self.bet_size
+                net = -bet
+            elif blackjack and not dealer_blackjack:
+                self.num_blackjacks  += 1
+                stats.num_blackjacks += 1
+                self.num_wins        += 1
+                stats.num_wins       += 1
+                hand.set_result(True)
+                net = self.rules.blackjack_payout * bet
+            elif dealer_blackjack and not blackjack:
+                hand.set_result(False)
+                net = -bet
             elif total == dealer_total:
-                self.num_pushes += 1
+                self.num_pushes  += 1
+                stats.num_pushes += 1
                 hand.set_result(False)
+                net = 0
             elif total < dealer_total:
                 hand.set_result(False)
-                self.money -= self.bet_size
-            elif total == 21 and hand.num_cards() == 2:
-                self.num_blackjacks += 1
-                num_hands_won += 1
-                self.num_wins += 1
-                hand.set_result(True)
-                self.money += (self.rules.blackjack_payout * self.bet_size)
+                net = -bet
             elif total > dealer_total:
-                num_hands_won += 1
-                self.num_wins += 1
+                self.num_wins  += 1
+                stats.num_wins += 1
                 hand.set_result(True)
-                self.money += self.bet_size
+                net = bet
             else:
                 assert False, 'UH OH'
+            hand.net    = net
+            self.money += net
+            round_net  += net
+
+        return round_net / BASE_BET
 
     def hand_string(self) -> str:
         res = ''
@@ -934,6 +1099,17 @@ class Player:
                 res += 'and '
         return res
 
+    def merge(self, other : 'Player') -> None:
+        '''
+        Adds another player's money and stats to ours.
+        Used to combine the same seat across parallel workers.
+        '''
+        self.money          += other.money
+        self.num_hands      += other.num_hands
+        self.num_wins       += other.num_wins
+        self.num_pushes     += other.num_pushes
+        self.num_blackjacks += other.num_blackjacks
+
     def player_win_percentage_str(self) -> str:
         return f'Won {round((self.num_wins / self.num_hands) * 100, 2)}%. Push {round((self.num_pushes / self.num_hands) * 100, 2)}%. BJ {round((self.num_blackjacks / self.num_hands) * 100, 2)}%'
 
@@ -942,26 +1118,44 @@ class Dealer:
     '''
     Class Modelling a Black Jack Dealer.
     '''
-    # TODO: Reset the shoe and discard pile if we've reached the cut card
-    #
-    def __init__(self, rules : Rules) -> None:
+    def __init__(self, rules : Rules, rng : np.random.Generator = None, book : TheBook = None, counting = None) -> None:
         '''
-        Constructor
+        Constructor.
+        The book, if given, is shared by the dealer and every player.
+        counting, if given, is a counting.CountingStrategy that supplies a counted shoe and counting players.
         '''
         self.rules        = rules
-        self.shoe         = Deck(self.rules.num_decks)
-        self.discard_pile = Deck()
-        self.book         = TheBook(self.rules)
-        self.players      = [ Player(self.rules) for _ in range(self.rules.num_players) ]
+        self.book         = book if book is not None else TheBook(self.rules)
+        self.counting     = counting is not None
+        if counting is None:
+            self.shoe     = Deck(self.rules.num_decks, rng, self.rules.penetration)
+            self.players  = [ Player(self.rules, self.book) for _ in range(self.rules.num_players) ]
+        else:
+            self.shoe     = counting.make_shoe(self.rules, rng)
+            self.players  = [ counting.make_player(self.rules, self.book, self.shoe) for _ in range(self.rules.num_players) ]
+        self.verbose      = False # Print the hand when it is settled
+        self.sink         = None  # Optional ResultSink receiving every settled hand
+        self.stats        = SimulationStats()
+        self.hand_number  = 0
         self.reset_table()
 
     def reset_table(self) -> None:
         '''
         Resets the table for a hand.
+        The last hand's cards go on the discard pile, and the shoe is reshuffled if the cut card came out.
         '''
+        self.shoe.discard_round()
+        if self.shoe.reached_cut_card():
+            self.shoe.shuffle()
+
         self.hand    = Hand()
-        for player in self.players:
-            player.reset()
+        if self.counting:
+            count_index = self.shoe.count_index() # Worked out once for the round, every seat bets on it
+            for player in self.players:
+                player.reset(count_index)
+        else:
+            for player in self.players:
+                player.reset()
 
     def perform_action(self, game_state : GameState) -> GameState:
         '''
@@ -1013,19 +1207,104 @@ class Dealer:
         Checks the game state and sends back to player action if more can be done.
         Otherwise, ends the hand.
         '''
-        dealer_total = self.hand.best_total()
+        dealer_total     = self.hand.best_total()
+        dealer_blackjack = dealer_total == 21 and len(self.hand.cards) == 2
 
+        round_net = 0
         for player in self.players:
-            player.won_or_lost(dealer_total)
+            round_net += player.won_or_lost(dealer_total, dealer_blackjack, self.stats)
+        self.stats.add(round_net / len(self.players))
+
+        if self.sink is not None:
+            self.record_results(dealer_total)
 
         # Log our results
-        print(f'Dealer Hand: {str(self.hand)} {self.hand.totals_string()}')
-        for i, player in enumerate(self.players):
-            print(f'Player {i + 1} Hand: {player.hand_string()}')
-        print()
+        if self.verbose:
+            print(f'Dealer Hand: {str(self.hand)} {self.hand.totals_string()}')
+            for i, player in enumerate(self.players):
+                print(f'Player {i + 1} Hand: {player.hand_string()}')
+            print()
 
         return GameState.NOT_PLAYING
 
+    def play_round(self) -> None:
+        '''
+        A whole round without the GameState machine, for when nothing watches the phases (no logging, sink or instrumentation).
+        Deals, plays and settles exactly as initial_deal, player_action, dealer_action and check_game_state do,
+        drawing the same cards in the same order, but straight through over local variables.
+        '''
+        draw      = self.shoe.draw_card
+        hand      = self.hand
+        players   = self.players
+        add_card  = hand.add_card
+
+        # Initial deal
+        #
+        for _ in range(2):
+            add_card(draw())
+            for player in players:
+                player.hands[0].add_card(draw())
+
+        # Players
+        #
+        face_card = hand.cards[0]
+        for player in players:
+            first  = player.hands[0]
+            action = player.book.player_best_move(first, face_card, False)
+            if action is PlayerAction.SPLIT:
+                player.split(first, self.shoe)
+                for split_hand in player.hands:
+                    self.play_out(player, split_hand, player.book.player_best_move(split_hand, face_card, True), face_card)
+            elif action is not PlayerAction.STAND:
+                self.play_out(player, first, action, face_card)
+
+        # Dealer, by the same rule as TheBook.dealer_best_move
+        #
+        hits_soft_seventeen = self.rules.dealer_stand is DealerStand.HIT_SOFT_SEVENTEEN
+        while hand.soft_total < 17 or (hand.soft_total == 17 and hand.hard_total < 17 and hits_soft_seventeen):
+            add_card(draw())
+
+        # Settle
+        #
+        dealer_total     = hand.best_total()
+        dealer_blackjack = dealer_total == 21 and len(hand.cards) == 2
+        stats            = self.stats
+        round_net        = 0
+        for player in players:
+            round_net += player.won_or_lost(dealer_total, dealer_blackjack, stats)
+        stats.add(round_net / len(players))
+
+    def play_out(self, player : Player, hand : Hand, action : PlayerAction, face_card : int) -> None:
+        '''
+        Plays hand from its first action until it stands, doubles or busts, as Player.perform_actions does.
+        Splits are dealt by play_round before this, and a split hand is never split again, so action is never SPLIT.
+        '''
+        draw      = self.shoe.draw_card
+        best_move = player.book.player_best_move
+        while True:
+            if action is PlayerAction.HIT:
+                hand.add_card(draw())
+            elif action is PlayerAction.DOUBLE_DOWN:
+                hand.add_card(draw())
+                if self.rules.allow_double_down:
+                    hand.double_down()
+                    return
+            else:
+                assert action is not PlayerAction.SPLIT, 'Error: Split hands cannot be split again.'
+                return
+            if hand.hard_total > 21:
+                return
+            action = best_move(hand, face_card, player.has_split)
+
+    def record_results(self, dealer_total : int) -> None:
+        '''
+        Sends every settled player hand to the sink.
+        '''
+        record = self.sink.record
+        for seat, player in enumerate(self.players):
+            for hand_index, hand in enumerate(player.hands):
+                record((self.hand_number, seat, hand_index, dealer_total, hand.best_total(), len(hand.cards), hand.bet_size, hand.net))
+
     def print_results(self):
         '''
         Prints the player results.
@@ -1038,32 +1317,175 @@ class Table:
     '''
     Class Modelling a Black Jack Table.
     '''
-    def __init__(self, rules : Rules) -> None:
+    def __init__(self,
+                 rules        : Rules,
+                 seed         : int | np.random.SeedSequence = None,
+                 verbosity    : Verbosity = Verbosity.SUMMARY,
+                 sink         : ResultSink = None,
+                 sample_every : int = 1000,
+                 book         : TheBook = None,
+                 counting     = None,
+                 instrument   : bool = False) -> None:
         '''
-        Constructor
+        Constructor.
+        The seed drives the shoe, and is split into one stream per worker for parallel runs.
+        SAMPLED verbosity prints every sample_every-th hand.
+        The sink, if given, receives a record of every settled hand and is closed at the end of the run.
+        The book defaults to the built in charts, see strategy_generator for rule specific ones.
+        counting, a counting.CountingStrategy, makes every seat count cards.
+        instrument times the phases of a sample of rounds and counts what happens in all of them, see instrumentation.PhaseTimings.
         '''
-        self.dealer          = Dealer(rules)
+        self.rules           = rules
+        self.seed            = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.counting        = counting
+        self.dealer          = Dealer(rules, np.random.default_rng(self.seed), book, counting)
         self.num_simulations = rules.num_simulations
         self.game_state      = GameState.INITIAL_DEAL
+        self.verbosity       = verbosity
+        self.sample_every    = sample_every
+        self.dealer.sink     = sink
+        self.stats           = self.dealer.stats
+        self.timings         = PhaseTimings() if instrument else None
 
-    def run_simulations(self) -> None:
+    def run_simulations(self, num_workers : int = 1, checkpoint_path : str = None, checkpoint_every : int = CHECKPOINT_EVERY) -> None:
         '''
-        Entry point to hands of blackjack
+        Entry point to hands of blackjack.
+        With more than one worker the hands are split across a process pool.
+        Each worker plays its share on its own table seeded from self.seed.spawn,
+        so the merged results only depend on the seed and the number of workers.
+        With checkpoint_path, each table saves a checkpoint every checkpoint_every hands, and running again
+        with the same path, seed and number of workers carries on from them, finishing exactly as an
+        uninterrupted run would. A checkpoint saved with other rules, seed, book, counting or number of
+        workers raises ValueError instead of being resumed. The checkpoints are removed once the run is done.
         '''
-        count = 0
-        for _ in range(self.num_simulations):
-            count += 1
-            print(f'Playing hand #{count}')
-            self.play_hand()
-            self.dealer.reset_table()
-            self.game_state = GameState.INITIAL_DEAL
-        print(f'Ran {count} BlackJack Simulations.')
+        sink = self.dealer.sink
+        if num_workers <= 1:
+            if checkpoint_path is None:
+                self.play_hands(self.num_simulations)
+            else:
+                self.play_checkpointed(self.num_simulations, checkpoint_path, checkpoint_every)
+        else:
+            shares = [ self.num_simulations // num_workers + (1 if i < self.num_simulations % num_workers else 0) for i in range(num_workers) ]
+            sinks  = [ sink.for_worker(i) if sink is not None else None for i in range(num_workers) ]
+            paths  = [ worker_path(checkpoint_path, i) if checkpoint_path is not None else None for i in range(num_workers) ]
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                results = list(executor.map(_play_share, [ self.rules ] * num_workers, shares, self.seed.spawn(num_workers), sinks, [ self.dealer.book ] * num_workers, [ self.counting ] * num_workers, paths, [ checkpoint_every ] * num_workers, [ self.timings is not None ] * num_workers, [ num_workers ] * num_workers))
+            for worker_players, worker_stats, worker_timings in results:
+                for player, worker_player in zip(self.dealer.players, worker_players):
+                    player.merge(worker_player)
+                self.stats.merge(worker_stats)
+                if worker_timings is not None:
+                    self.timings.merge(worker_timings)
+            for path in paths:
+                if path is not None:
+                    remove_checkpoint(path)
+
+        if checkpoint_path is not None:
+            remove_checkpoint(checkpoint_path)
+        if sink is not None:
+            sink.close()
+
+        self.print_summary()
+
+    def play_checkpointed(self, count : int, path : str, every : int = CHECKPOINT_EVERY, num_workers : int = 1) -> None:
+        '''
+        Plays until count hands have been played, restoring this table from the checkpoint at path
+        first if there is one and saving the whole table there every every hands.
+        num_workers is how many tables the run is split across. The checkpoint is only restored if it was
+        saved by a table with the same rules, seed, book, counting, instrumentation and num_workers playing count hands.
+        '''
+        assert self.dealer.sink is None, 'Error: Runs with a sink cannot be checkpointed.'
+        key      = run_key(self.rules, self.seed, self.dealer.book.book, self.counting, self.timings is not None, num_workers, count)
+        restored = load_checkpoint(path, key)
+        if restored is not None:
+            self.__dict__.update(restored.__dict__)
+
+        while self.dealer.hand_number < count:
+            self.play_hands(min(every, count - self.dealer.hand_number))
+            save_checkpoint(path, key, self)
+
+    def run_to_precision(self,
+                         ci_width    : float,
+                         max_hands   : int = None,
+                         max_seconds : float = None,
+                         batch_size  : int = 10_000,
+                         z           : float = 1.96) -> int:
+        '''
+        Plays hands in batches until the confidence interval on the player edge
+        is at most ci_width wide (in units of the base bet, so 0.001 is +/- 0.05%),
+        or until the hand or time budget runs out. At least one budget must be given, since ci_width may never be reached.
+        Plays serially on this table, without checkpoints.
+        Returns the number of hands actually played.
+        '''
+        assert max_hands is not None or max_seconds is not None, 'Error: Give max_hands or max_seconds, or the run may never stop.'
+        start  = time.perf_counter()
+        played = 0
+        while max_hands is None or played < max_hands:
+            count = batch_size if max_hands is None else min(batch_size, max_hands - played)
+            self.play_hands(count)
+            played += count
+
+            low, high = self.stats.confidence_interval(z)
+            if high - low <= ci_width:
+                break
+            if max_seconds is not None and time.perf_counter() - start >= max_seconds:
+                break
+
+        if self.dealer.sink is not None:
+            self.dealer.sink.close()
+
+        self.num_simulations = played
+        self.print_summary()
+        return played
+
+    def print_summary(self) -> None:
+        '''
+        Prints the end of run results.
+        '''
+        if self.verbosity is Verbosity.SILENT:
+            return
+
+        print(f'Ran {self.num_simulations} BlackJack Simulations.')
         print('The results are: ')
         self.dealer.print_results()
-        print(f'Number of hands played: {num_hands}')
-        print(f'Number of hands won: {num_hands_won}')
-        print(f'Win Percentage: %{round((num_hands_won / num_hands) * 100, 2)}')
-
+        print(f'Number of hands played: {self.stats.num_hands}')
+        print(f'Number of hands won: {self.stats.num_wins}')
+        print(f'Win Percentage: %{self.stats.win_percentage()}')
+        print(self.stats.house_edge_str())
+        if self.timings is not None:
+            print(self.timings.report_str())
+
+    def play_hands(self, count : int, on_round = None) -> None:
+        '''
+        Plays count hands on this table.
+        on_round, if given, is called with the dealer after each hand is settled and before the table is cleared.
+        Hands go through the GameState machine when they are logged, recorded or instrumented, and through
+        the straight line Dealer.play_round otherwise. Both deal and settle identically.
+        '''
+        dealer        = self.dealer
+        timings       = self.timings
+        full          = self.verbosity is Verbosity.FULL
+        sample_every  = self.sample_every if self.verbosity is Verbosity.SAMPLED else 0
+        if timings is not None:
+            play_hand = self.play_hand_instrumented
+        elif full or sample_every > 0 or dealer.sink is not None:
+            play_hand = self.play_hand
+        else:
+            play_hand = dealer.play_round
+        reset_table   = dealer.reset_table if timings is None else self.reset_table_instrumented
+        start         = time.perf_counter()
+        for i in range(count):
+            dealer.hand_number += 1
+            dealer.verbose      = full or (sample_every > 0 and dealer.hand_number % sample_every == 0)
+            if dealer.verbose:
+                print(f'Playing hand #{dealer.hand_number}')
+            play_hand()
+            if on_round is not None:
+                on_round(dealer)
+            reset_table()
+            self.game_state = GameState.INITIAL_DEAL
+        if timings is not None:
+            timings.elapsed += time.perf_counter() - start
 
     def play_hand(self) -> None:
         '''
@@ -1072,6 +1494,75 @@ class Table:
         while self.game_state is not GameState.NOT_PLAYING:
             self.game_state = self.dealer.perform_action(self.game_state)
 
+    def play_hand_instrumented(self) -> None:
+        '''
+        play_hand, counting what happened in the round and, on sampled rounds, timing each phase into self.timings.
+        '''
+        dealer    = self.dealer
+        timings   = self.timings
+        discarded = dealer.shoe.discarded
+        if dealer.hand_number % timings.sample_every:
+            self.play_hand()
+        else:
+            perform_action = dealer.perform_action
+            seconds        = timings.seconds
+            calls          = timings.calls
+            clock          = time.perf_counter
+            game_state     = self.game_state
+            start          = clock()
+            while game_state is not GameState.NOT_PLAYING:
+                phase      = game_state._value_ # Enum.value is a descriptor that costs more than the clock
+                game_state = perform_action(game_state)
+                end        = clock()
+                seconds[phase] += end - start
+                calls[phase]   += 1
+                start      = end
+            self.game_state       = game_state
+            timings.timed_rounds += 1
+        timings.count_round(dealer, discarded)
+
+    def reset_table_instrumented(self) -> None:
+        '''
+        Dealer.reset_table, counting shuffles and, on sampled rounds, timed as a shuffle when the cut card came out and as a plain reset otherwise.
+        '''
+        dealer  = self.dealer
+        timings = self.timings
+        if dealer.hand_number % timings.sample_every:
+            dealer.reset_table()
+        else:
+            start   = time.perf_counter()
+            dealer.reset_table()
+            elapsed = time.perf_counter() - start
+            phase   = SHUFFLE_PHASE if dealer.shoe.cursor == 0 else RESET_PHASE
+            timings.seconds[phase] += elapsed
+            timings.calls[phase]   += 1
+        if dealer.shoe.cursor == 0:
+            timings.shuffles += 1
+
+
+def _play_share(rules            : Rules,
+                count            : int,
+                seed             : np.random.SeedSequence,
+                sink             : ResultSink,
+                book             : TheBook,
+                counting,
+                checkpoint_path  : str = None,
+                checkpoint_every : int = CHECKPOINT_EVERY,
+                instrument       : bool = False,
+                num_workers      : int = 1) -> tuple:
+    '''
+    Worker entry point for parallel runs.
+    Plays count hands silently on a fresh table (or the one checkpointed at checkpoint_path) and returns its players, stats and timings for merging.
+    '''
+    table = Table(rules, seed, Verbosity.SILENT, sink, book=book, counting=counting, instrument=instrument)
+    if checkpoint_path is None:
+        table.play_hands(count)
+    else:
+        table.play_checkpointed(count, checkpoint_path, checkpoint_every, num_workers)
+    if sink is not None:
+        sink.close()
+    return table.dealer.players, table.stats, table.timings
+
 
 def play_blackjack():
     '''
@@ -1140,6 +1631,15 @@ def play_blackjack():
     ALLOW_SURRENDER   = False # This is a nice to have but we won't implement this yet
     ALLOW_INSURANCE   = False # You should never have insurance
     DEALER_STAND      = DealerStand.STAND_SOFT_SEVENTEEN
+    PENETRATION       = 0.8 # Cut card about 1.2 decks from the back of the shoe
+    NUM_WORKERS       = 1    # Processes to split the hands across
+    SEED              = None # Set for reproducible runs
+    VERBOSITY         = Verbosity.SUMMARY
+    SINK              = None # e.g. CsvSink('hands.csv'), JsonlSink('hands.jsonl') or BinarySink('hands.bin')
+    TARGET_CI_WIDTH   = None # e.g. 0.001 to play until the edge is known to +/- 0.05%, capped at NUM_SIMULATIONS (one worker, no checkpoints)
+    CHECKPOINT_PATH   = None # e.g. 'blackjack.ckpt' to save progress, and pick up from it if the run is started again (needs a SEED)
+    INSTRUMENT        = False # Time each phase of the round and report hands/sec
+    PROFILE_PATH      = None # e.g. 'blackjack.pstats' to run under cProfile (this process only, so use one worker)
     RULES = Rules(
         NUM_DECKS,
         NUM_PLAYERS,
@@ -1149,12 +1649,22 @@ def play_blackjack():
         ALLOW_RE_SPLIT,
         ALLOW_SURRENDER,
         ALLOW_INSURANCE,
-        DEALER_STAND)
+        DEALER_STAND,
+        PENETRATION)
 
     # Initialize the table and play blackjack.
     #
-    table = Table(RULES)
-    table.run_simulations()
+    assert CHECKPOINT_PATH is None or SEED is not None, 'Error: An unseeded run cannot be resumed, so set SEED to checkpoint.'
+    table = Table(RULES, SEED, VERBOSITY, SINK, instrument=INSTRUMENT)
+    if TARGET_CI_WIDTH is not None:
+        assert NUM_WORKERS == 1 and CHECKPOINT_PATH is None, 'Error: Precision targeted runs play on one worker without checkpoints.'
+        run = lambda : table.run_to_precision(TARGET_CI_WIDTH, max_hands=NUM_SIMULATIONS)
+    else:
+        run = lambda : table.run_simulations(NUM_WORKERS, CHECKPOINT_PATH)
+    if PROFILE_PATH is not None:
+        profiled(PROFILE_PATH, run)
+    else:
+        run()
 
 
 if __name__ == '__main__':
@@ -1164,7 +1674,4 @@ if __name__ == '__main__':
     # import sys
     # sys.stdout = open('output.txt', 'w+')
 
-    num_hands     = 0
-    num_hands_won = 0
-
     play_blackjack()
\ No newline at end of file
@@ -0,0 +1,221 @@
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+import os
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+'''
+Martingale session plots.
+
+Session plots are drawn with the headless Agg backend on one figure per process that is cleared and
+reused for every session, and long sessions are cut down to MAX_POINTS by min/max bucketing
+before they are sent to a worker, which keeps every dip and spike a full plot would show.
+
+The fan chart instead aggregates every session into one view, streaming each bet's cash into
+a fixed size grid so its memory doesn't depend on the number or length of sessions.
+'''
+
+MAX_POINTS    = 2000 # About the width of the saved image in pixels, so more points don't draw any differently
+NUM_COLUMNS   = 512  # Bet number columns in a fan chart, each twice as far apart whenever the sessions outgrow them
+NUM_CASH_BINS = 512  # Cash rows in a fan chart
+FAN_PERCENTILES = ((5, 95), (25, 75))
+
+
+class PlotSelection(Enum):
+    '''
+    Enum which models which sessions get plotted.
+    '''
+    NONE    = 0 # No plots
+    ALL     = 1 # Every session
+    SAMPLED = 2 # Every Nth session
+    RUINED  = 3 # Only the sessions that went broke
+
+
+def is_selected(selection : PlotSelection, number : int, final_cash : int, every : int = 1) -> bool:
+    '''
+    Whether session number (counting from 1) that ended with final_cash should be plotted.
+    '''
+    match selection:
+        case PlotSelection.NONE:
+            return False
+        case PlotSelection.ALL:
+            return True
+        case PlotSelection.SAMPLED:
+            return number % every == 0
+        case PlotSelection.RUINED:
+            return final_cash <= 0
+
+
+def downsample(cash : np.ndarray, max_points : int = MAX_POINTS) -> tuple:
+    '''
+    Returns (bet numbers, cash) with at most max_points points (plus the first and last), keeping the
+    lowest and highest point of each bucket in the order they happened. Short sessions are returned whole.
+    '''
+    count = len(cash)
+    if count <= max_points:
+        return np.arange(1, count + 1), np.asarray(cash)
+
+    num_buckets = max_points // 2
+    bucket_size = -(-count // num_buckets)
+    padded      = np.pad(np.asarray(cash), (0, num_buckets * bucket_size - count), mode='edge').reshape(num_buckets, bucket_size)
+    starts      = np.arange(num_buckets) * bucket_size
+    lows        = starts + padded.argmin(axis=1)
+    highs       = starts + padded.argmax(axis=1)
+    indices     = np.unique(np.minimum(np.concatenate(([0, count - 1], lows, highs)), count - 1))
+    return indices + 1, np.asarray(cash)[indices]
+
+
+def render_sessions(sessions : list, rules, plots_dir : str, num_workers : int = 1, max_points : int = MAX_POINTS) -> None:
+    '''
+    Saves a plot for each (number, cash) session to plots_dir, across num_workers processes.
+    '''
+    os.makedirs(plots_dir, exist_ok=True)
+    jobs = [ (number, *downsample(cash, max_points), rules, plots_dir) for number, cash in sessions ]
+    if num_workers <= 1:
+        for job in jobs:
+            _render(job)
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            for _ in executor.map(_render, jobs, chunksize=max(1, len(jobs) // (4 * num_workers))):
+                pass
+
+
+# The figure this process draws every plot on.
+#
+_figure = None
+_axes   = None
+
+
+def _render(job : tuple) -> None:
+    global _figure, _axes
+    if _figure is None:
+        _figure, _axes = plt.subplots()
+
+    number, bets, cash, rules, plots_dir = job
+    min_cash = cash.min()
+    max_cash = cash.max()
+
+    _axes.cla()
+    _axes.plot([1, bets[-1]], [rules.cash_available, rules.cash_available], color='red')
+    _axes.plot(bets, cash, color='blue')
+    _axes.set_xlabel('Bet #')
+    _axes.set_ylabel('Cash Available')
+    _axes.set_title(f'Martingale Simulation #{number}')
+    _axes.text(1, ((max_cash - min_cash) * 0.8) + min_cash, f'Cash Available: ${rules.cash_available}\nGoal Winnings: ${rules.goal}\nInitial Bet:         ${rules.unit}', fontsize=8)
+    _figure.savefig(os.path.join(plots_dir, f'Simulation{number}'))
+
+
+class FanChart:
+    '''
+    Fixed memory aggregate of every session's cash against bet number.
+
+    Column c holds the cash of every session after c * bet_width bets, as a histogram over NUM_CASH_BINS bins.
+    Sessions still playing are sampled into the column directly. Sessions that have finished keep their final
+    cash, so each one is counted once, in the column it finished in, and carried into later columns when the
+    grid is read. When a session outgrows the last column the bet width doubles and the columns are halved.
+    Ruins are kept the same way, by the column the session went broke in.
+    '''
+    def __init__(self, rules, num_columns : int = NUM_COLUMNS, num_cash_bins : int = NUM_CASH_BINS) -> None:
+        self.rules         = rules
+        self.bet_width     = 1
+        self.num_cash_bins = num_cash_bins
+        self.low_cash      = -rules.max_bet # A ruined session loses at most one bet past zero
+        self.high_cash     = rules.cash_available + rules.goal + rules.max_bet
+        self.playing       = np.zeros((num_columns, num_cash_bins), dtype=np.int64)
+        self.finished      = np.zeros((num_columns, num_cash_bins), dtype=np.int64)
+        self.ruins         = np.zeros(num_columns, dtype=np.int64)
+
+    def sample(self, bets : int, cash : np.ndarray) -> None:
+        '''
+        Adds the cash of the sessions still playing after bets bets, if that is a column.
+        '''
+        if bets % self.bet_width:
+            return
+        while bets // self.bet_width >= len(self.playing):
+            self._widen()
+        if bets % self.bet_width == 0:
+            self.playing[bets // self.bet_width] += self._histogram(cash)
+
+    def finish(self, bets : np.ndarray, cash : np.ndarray) -> None:
+        '''
+        Adds sessions that ended after bets bets with final cash.
+        '''
+        if len(bets) == 0:
+            return
+        while -(-int(bets.max()) // self.bet_width) >= len(self.playing):
+            self._widen()
+        columns = -(-bets // self.bet_width)
+        np.add.at(self.finished, (columns, self._bins(cash)), 1)
+        ruined = cash <= 0
+        self.ruins += np.bincount(columns[ruined], minlength=len(self.ruins))
+
+    def grid(self) -> np.ndarray:
+        '''
+        The cash histogram of every session (playing or finished) at each column.
+        '''
+        return self.playing + self.finished.cumsum(axis=0)
+
+    def percentiles(self, percentiles : tuple) -> tuple:
+        '''
+        Returns (bet numbers, one row of cash per percentile) for the columns any session reached.
+        '''
+        used    = int(np.nonzero(self.playing.any(axis=1))[0].max()) + 1
+        grid    = self.grid()[:used]
+        cum     = grid.cumsum(axis=1)
+        totals  = cum[:, -1:]
+        centres = self.low_cash + (np.arange(self.num_cash_bins) + 0.5) * (self.high_cash - self.low_cash) / self.num_cash_bins
+        rows    = [ centres[np.minimum((cum < totals * percentile / 100).sum(axis=1), self.num_cash_bins - 1)] for percentile in percentiles ]
+        return np.arange(used) * self.bet_width, np.array(rows)
+
+    def render(self, path : str) -> None:
+        '''
+        Saves the percentile bands of cash against bet number, with a histogram of when sessions went broke.
+        '''
+        flat         = [ percentile for band in FAN_PERCENTILES for percentile in band ]
+        bets, rows   = self.percentiles((*flat, 50))
+        figure, (fan, ruin) = plt.subplots(2, 1, figsize=(8, 8))
+        for i, (low, high) in enumerate(FAN_PERCENTILES):
+            fan.fill_between(bets, rows[2 * i], rows[2 * i + 1], color='blue', alpha=0.2 * (i + 1), linewidth=0, label=f'{low}th - {high}th percentile')
+        fan.plot(bets, rows[-1], color='blue', label='Median')
+        fan.axhline(self.rules.cash_available, color='red')
+        fan.set_xlabel('Bet #')
+        fan.set_ylabel('Cash Available')
+        fan.set_title('Martingale Simulations')
+        fan.legend(fontsize=8)
+
+        used = int(np.nonzero(self.ruins)[0].max()) + 1 if self.ruins.any() else 1
+        ruin.bar(np.arange(used) * self.bet_width, self.ruins[:used], width=self.bet_width, align='edge', color='red')
+        ruin.set_xlabel('Bet # went broke')
+        ruin.set_ylabel('Sessions')
+        figure.tight_layout()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        figure.savefig(path)
+        plt.close(figure)
+
+    def _bins(self, cash : np.ndarray) -> np.ndarray:
+        bins = (cash - self.low_cash) * self.num_cash_bins // (self.high_cash - self.low_cash)
+        return np.clip(bins, 0, self.num_cash_bins - 1)
+
+    def _histogram(self, cash : np.ndarray) -> np.ndarray:
+        return np.bincount(self._bins(cash), minlength=self.num_cash_bins)
+
+    def _widen(self) -> None:
+        '''
+        Doubles the bet width. Samples on the old odd columns aren't on the new grid and are dropped, and
+        finished sessions and ruins move to the new column at or after the one they were in.
+        '''
+        num_columns = len(self.playing)
+        playing     = np.zeros_like(self.playing)
+        playing[:num_columns // 2] = self.playing[0::2]
+        finished    = np.zeros_like(self.finished)
+        ruins       = np.zeros_like(self.ruins)
+        np.add.at(finished, (np.arange(num_columns) + 1) // 2, self.finished)
+        np.add.at(ruins, (np.arange(num_columns) + 1) // 2, self.ruins)
+        self.playing    = playing
+        self.finished   = finished
+        self.ruins      = ruins
+        self.bet_width *= 2
@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+
+
+'''
+The settings of a martingale session.
+
+Kept apart from InitialMartingaleSimulator so that anything which only needs the settings
+(betting_systems, for one) doesn't load the simulator's solver and plotting along with them.
+'''
+
+# The goal of martingale is to double your money.
+# The rules are as follows:
+# 1. Bet 1 unit
+# 2. If you win, great!
+# 3. If you didn't win, double your bet and repeat until you hit your goal of doubling your initial unit.
+#
+CASH_AVAILABLE  = 50_000
+UNIT            = 100
+MAX_BET         = CASH_AVAILABLE # Realistically at a casino this is much lower, like 500 a bet or something
+GOAL            = UNIT
+WIN_PROBABILITY = 0.5 # Blackjack has a realistic probability of 0.4222
+
+
+@dataclass(frozen=True)
+class MartingaleRules:
+    ''' Class for modeling a martingale session. '''
+    cash_available:  int   = CASH_AVAILABLE
+    unit:            int   = UNIT
+    max_bet:         int   = MAX_BET
+    goal:            int   = GOAL
+    win_probability: float = WIN_PROBABILITY
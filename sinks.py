@@ -0,0 +1,130 @@
+import csv
+import json
+import numpy as np
+
+
+'''
+Sinks for per-hand blackjack results.
+
+A sink buffers records in memory and writes them out in large batches,
+so logging every hand costs a tuple append on the hot path instead of a print.
+The file is only opened on the first write, which keeps unused sinks cheap to copy into workers.
+'''
+
+# One row per settled player hand.
+#
+HAND_RECORD_FIELDS = ('hand_number', 'seat', 'hand_index', 'dealer_total', 'player_total', 'num_cards', 'bet', 'net')
+HAND_RECORD_DTYPE  = np.dtype([
+    ('hand_number',  '<u4'),
+    ('seat',         'u1'),
+    ('hand_index',   'u1'),
+    ('dealer_total', 'u1'),
+    ('player_total', 'u1'),
+    ('num_cards',    'u1'),
+    ('bet',          '<f4'),
+    ('net',          '<f4'),
+])
+
+
+class ResultSink:
+    '''
+    Base class for buffered hand result sinks.
+    Subclasses implement write_batch.
+    '''
+    MODE = 'w'
+
+    def __init__(self, path : str, batch_size : int = 65_536) -> None:
+        self.path       = path
+        self.batch_size = batch_size
+        self.buffer     = []
+        self.file       = None
+
+    def __enter__(self) -> 'ResultSink':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict:
+        assert self.file is None, 'Error: Cannot copy a sink that has already been written to.'
+        return self.__dict__
+
+    def record(self, row : tuple) -> None:
+        '''
+        Buffers a row in HAND_RECORD_FIELDS order.
+        '''
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        '''
+        Writes out everything that is buffered.
+        '''
+        if not self.buffer:
+            return
+        if self.file is None:
+            self.file = self.open()
+        self.write_batch(self.buffer)
+        self.buffer = []
+
+    def close(self) -> None:
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def open(self):
+        return open(self.path, self.MODE, newline='')
+
+    def write_batch(self, rows : list) -> None:
+        raise NotImplementedError
+
+    def for_worker(self, worker : int) -> 'ResultSink':
+        '''
+        Returns an unopened sink of the same kind writing to a per-worker file.
+        '''
+        stem, dot, extension = self.path.rpartition('.')
+        path = f'{stem}.{worker}.{extension}' if dot else f'{self.path}.{worker}'
+        return type(self)(path, self.batch_size)
+
+
+class CsvSink(ResultSink):
+    '''
+    Writes hand records as CSV with a header row.
+    '''
+    def open(self):
+        file = super().open()
+        csv.writer(file).writerow(HAND_RECORD_FIELDS)
+        return file
+
+    def write_batch(self, rows : list) -> None:
+        csv.writer(self.file).writerows(rows)
+
+
+class JsonlSink(ResultSink):
+    '''
+    Writes hand records as one JSON object per line.
+    '''
+    def write_batch(self, rows : list) -> None:
+        self.file.write(''.join(json.dumps(dict(zip(HAND_RECORD_FIELDS, row))) + '\n' for row in rows))
+
+
+class BinarySink(ResultSink):
+    '''
+    Writes hand records as raw HAND_RECORD_DTYPE structs. Read them back with read_binary.
+    '''
+    MODE = 'wb'
+
+    def open(self):
+        return open(self.path, self.MODE)
+
+    def write_batch(self, rows : list) -> None:
+        np.array(rows, dtype=HAND_RECORD_DTYPE).tofile(self.file)
+
+
+def read_binary(path : str) -> np.ndarray:
+    '''
+    Loads a file written by BinarySink as a structured array.
+    '''
+    return np.fromfile(path, dtype=HAND_RECORD_DTYPE)
@@ -0,0 +1,111 @@
+import math
+import numpy as np
+
+
+class SimulationStats:
+    '''
+    Mergeable accumulator for a blackjack run.
+
+    Each sample is one round's net result in units of the base bet, averaged over the seats.
+    The mean and centred sum of squares are updated with Welford's method, and
+    merge combines two accumulators with Chan's parallel update, so shards can be
+    played anywhere and combined in any grouping.
+    Hand outcome counts are kept alongside for the usual win/push/blackjack percentages.
+    '''
+    def __init__(self) -> None:
+        self.count = 0   # Samples (rounds)
+        self.total = 0.0 # Sum of samples
+        self.mean  = 0.0
+        self.m2    = 0.0 # Sum of squared deviations from the mean
+
+        self.num_hands      = 0
+        self.num_wins       = 0
+        self.num_pushes     = 0
+        self.num_blackjacks = 0
+
+    def add(self, units : float) -> None:
+        '''
+        Adds one round's net units.
+        '''
+        self.count += 1
+        self.total += units
+        delta       = units - self.mean
+        self.mean  += delta / self.count
+        self.m2    += delta * (units - self.mean)
+
+    def add_array(self, units : np.ndarray) -> None:
+        '''
+        Adds a batch of rounds at once by merging in the batch's own mean and sum of squares.
+        '''
+        batch       = SimulationStats()
+        batch.count = len(units)
+        if batch.count == 0:
+            return
+        batch.total = float(units.sum())
+        batch.mean  = batch.total / batch.count
+        batch.m2    = float(((units - batch.mean) ** 2).sum())
+        self.merge(batch)
+
+    def merge(self, other : 'SimulationStats') -> None:
+        '''
+        Folds another accumulator into this one.
+        '''
+        count = self.count + other.count
+        if count == 0:
+            return
+        delta       = other.mean - self.mean
+        self.m2    += other.m2 + delta * delta * self.count * other.count / count
+        self.mean  += delta * other.count / count
+        self.count  = count
+        self.total += other.total
+
+        self.num_hands      += other.num_hands
+        self.num_wins       += other.num_wins
+        self.num_pushes     += other.num_pushes
+        self.num_blackjacks += other.num_blackjacks
+
+    def sum_of_squares(self) -> float:
+        '''
+        The raw sum of squared samples.
+        '''
+        return self.m2 + self.count * self.mean * self.mean
+
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def standard_error(self) -> float:
+        return math.sqrt(self.variance() / self.count) if self.count > 0 else math.inf
+
+    def player_edge(self) -> float:
+        return self.mean
+
+    def house_edge(self) -> float:
+        return -self.mean
+
+    def confidence_interval(self, z : float = 1.96) -> tuple:
+        '''
+        Normal approximation interval on the player edge.
+        '''
+        half_width = z * self.standard_error()
+        return self.mean - half_width, self.mean + half_width
+
+    def win_percentage(self) -> float:
+        return round((self.num_wins / self.num_hands) * 100, 2) if self.num_hands else 0.0
+
+    def house_edge_str(self) -> str:
+        return f'House Edge: {round(self.house_edge() * 100, 3)}% +/- {round(self.standard_error() * 100, 3)}%'
+
+
+def ratio_residuals(totals : np.ndarray, counts : np.ndarray) -> np.ndarray:
+    '''
+    Each group's contribution to the error of the ratio estimate totals.sum() / counts.sum(),
+    linearized and scaled to one average group, e.g. the nets and rounds of each shoe.
+    '''
+    return (totals - counts * (totals.sum() / counts.sum())) / counts.mean()
+
+
+def residual_standard_error(residuals : np.ndarray) -> float:
+    '''
+    Standard error of a ratio estimate from its ratio_residuals, treating the groups as independent.
+    '''
+    return float(residuals.std(ddof=1) / math.sqrt(len(residuals))) if len(residuals) > 1 else math.inf
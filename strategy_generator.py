@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+
+from dealer_probabilities import BLACKJACK, BUST, dealer_distribution, remove_card, shoe_composition
+from main import HARD_VALUES, CardValue, PlayerAction, Rules, TheBook
+
+
+'''
+Basic strategy generator.
+
+Derives the hit/stand/double/split charts for any Rules by expected value recursion
+against the exact dealer outcome distribution for each face card. The player draws from
+the shoe with the face card removed (total dependent strategy), and the recursion follows
+this simulator's own rules: no hole card peek, doubling on any number of cards, one split
+and no re-splitting.
+
+Generated charts are written to STRATEGY_CACHE_DIR as JSON, named by a hash of the rules that
+affect strategy, so each rule variant is only solved once.
+'''
+
+STRATEGY_CACHE_DIR = 'StrategyCache'
+STRATEGY_VERSION   = 1 # Bump to invalidate cached charts when the recursion changes
+
+FACE_CARDS = [ value for value in CardValue if value is not CardValue.CUT ]
+
+
+def rules_key(rules : Rules) -> str:
+    '''
+    Hash of the rules that change the optimal strategy.
+    The blackjack payout, number of players and number of simulations don't, so they are left out.
+    '''
+    fields = {
+        'version'           : STRATEGY_VERSION,
+        'num_decks'         : rules.num_decks,
+        'dealer_stand'      : rules.dealer_stand.name,
+        'allow_double_down' : rules.allow_double_down,
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def generate_charts(rules : Rules) -> tuple:
+    '''
+    Solves the hard, soft and split charts for the rules, laid out like HARD_BOOK, SOFT_BOOK and SPLIT_BOOK.
+    '''
+    hard_book  = { total : {} for total in range(4, 22) }
+    soft_book  = { total : {} for total in range(12, 22) }
+    split_book = { CardValue(value) : {} for value in range(1, 11) }
+
+    shoe = shoe_composition(rules.num_decks)
+    for face_value in range(1, 11):
+        solver  = FaceSolver(rules, remove_card(shoe, face_value), face_value)
+        columns = [ face for face in FACE_CARDS if HARD_VALUES[face.value] == face_value ]
+        for face in columns:
+            for total in hard_book:
+                hard_book[total][face] = solver.best(total, False)[1]
+            for total in soft_book:
+                soft_book[total][face] = solver.best(total - 10, True)[1]
+            for value in range(1, 11):
+                split_book[CardValue(value)][face] = solver.pair_action(value)
+
+    return hard_book, soft_book, split_book
+
+
+def generated_book(rules : Rules, cache_dir : str = STRATEGY_CACHE_DIR) -> TheBook:
+    '''
+    Returns a TheBook playing the generated strategy for the rules,
+    loading it from the cache if it has been solved before.
+    '''
+    path = os.path.join(cache_dir, f'{rules_key(rules)}.json')
+    if os.path.exists(path):
+        with open(path) as file:
+            return TheBook.from_charts(rules, *_charts_from_json(json.load(file)))
+
+    charts = generate_charts(rules)
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(_charts_to_json(*charts), file, indent=1)
+    os.replace(temp_path, path)
+    return TheBook.from_charts(rules, *charts)
+
+
+class FaceSolver:
+    '''
+    Expected values against one dealer face card, memoized by hand.
+    '''
+    def __init__(self, rules : Rules, composition : tuple, face_value : int) -> None:
+        remaining          = sum(composition)
+        self.probabilities = [ (value, count / remaining) for value, count in enumerate(composition, start=1) if count ]
+        self.dealer        = dealer_distribution(composition, face_value, rules.dealer_stand)
+        self.allow_double  = rules.allow_double_down
+        self.memo          = {}
+
+    def stand(self, total : int) -> float:
+        '''
+        EV of standing on a non blackjack total. A dealer blackjack beats it, even a 21.
+        '''
+        dealer = self.dealer
+        ev     = dealer[BUST] - dealer[BLACKJACK]
+        for dealer_total in range(17, 22):
+            probability = dealer[dealer_total - 17]
+            if total > dealer_total:
+                ev += probability
+            elif total < dealer_total:
+                ev -= probability
+        return ev
+
+    def best(self, hard_total : int, has_ace : bool) -> tuple:
+        '''
+        (EV, PlayerAction) of the best play for the hand, never splitting.
+        '''
+        key = (hard_total, has_ace)
+        if key in self.memo:
+            return self.memo[key]
+
+        soft_total = hard_total + 10 if has_ace and hard_total <= 11 else hard_total
+        stand_ev   = self.stand(soft_total)
+        hit_ev     = 0.0
+        double_ev  = 0.0
+        for value, probability in self.probabilities:
+            next_hard = hard_total + value
+            next_ace  = has_ace or value == 1
+            if next_hard > 21:
+                hit_ev    -= probability
+                double_ev -= 2 * probability
+            else:
+                next_soft  = next_hard + 10 if next_ace and next_hard <= 11 else next_hard
+                hit_ev    += probability * self.best(next_hard, next_ace)[0]
+                double_ev += 2 * probability * self.stand(next_soft)
+
+        result = max((stand_ev, PlayerAction.STAND), (hit_ev, PlayerAction.HIT), key=lambda option : option[0])
+        if self.allow_double and double_ev > result[0]:
+            result = (double_ev, PlayerAction.DOUBLE_DOWN)
+        self.memo[key] = result
+        return result
+
+    def pair_action(self, value : int) -> PlayerAction:
+        '''
+        SPLIT if splitting the pair beats playing it as a total, otherwise the best unsplit play.
+        '''
+        card_value = HARD_VALUES[value]
+        split_ev   = 0.0
+        for drawn, probability in self.probabilities:
+            split_ev += probability * self.best(card_value + drawn, value == 1 or drawn == 1)[0]
+        split_ev *= 2
+
+        unsplit_ev, unsplit_action = self.best(2 * card_value, value == 1)
+        return PlayerAction.SPLIT if split_ev > unsplit_ev else unsplit_action
+
+
+def _charts_to_json(hard_book : dict, soft_book : dict, split_book : dict) -> dict:
+    def row(actions : dict) -> dict:
+        return { face.name : action.name for face, action in actions.items() }
+    return {
+        'hard'  : { str(total) : row(actions) for total, actions in hard_book.items() },
+        'soft'  : { str(total) : row(actions) for total, actions in soft_book.items() },
+        'split' : { pair.name  : row(actions) for pair, actions in split_book.items() },
+    }
+
+
+def _charts_from_json(charts : dict) -> tuple:
+    def row(actions : dict) -> dict:
+        return { CardValue[face] : PlayerAction[action] for face, action in actions.items() }
+    hard_book  = { int(total) : row(actions) for total, actions in charts['hard'].items() }
+    soft_book  = { int(total) : row(actions) for total, actions in charts['soft'].items() }
+    split_book = { CardValue[pair] : row(actions) for pair, actions in charts['split'].items() }
+    return hard_book, soft_book, split_book
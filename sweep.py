@@ -0,0 +1,192 @@
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import dataclasses
+import itertools
+import math
+import numpy as np
+
+from main import DealerStand, Rules, Table, TheBook, Verbosity
+from stats import ratio_residuals, residual_standard_error
+
+
+'''
+Rule variation sweeps with common random numbers.
+
+Every variant in a sweep plays the same shoes. The shoe is the only thing the seed drives, and it is
+only drawn from when the shoe is shuffled, so tables seeded alike shuffle to the same sequence of shoes
+however many cards each variant uses per hand. Play is counted a whole shoe at a time, so shoe k of one
+variant lines up with shoe k of every other, and the difference between two variants is estimated from
+their paired per shoe results, which cancels most of the luck of the cards they have in common.
+
+That only holds for variants with the same num_decks. A shoe of a different size is a different
+permutation altogether, so its shoes share nothing with the others and its difference error is no
+better than the independent one. Sweep the number of decks separately, or expect no gain from it.
+
+It also only holds while every variant reshuffles between rounds. A round that runs the shoe dry
+(deep penetration, many seats, many splits) shuffles the discards back in part way through, which
+draws from the generator at a point the other variants don't, so that variant's later shoes no longer
+line up with theirs. Those rounds are counted, and a variant that had any, or whose baseline did,
+reports its difference error as nan rather than an understated one.
+
+The shoes are split into shards across a process pool. Shard i of every variant is seeded from the same
+child of the sweep's seed, so the pairing holds across workers.
+'''
+
+NUM_SHARDS = 16
+
+# Columns of a sweep's results table.
+#
+SWEEP_FIELDS = (
+    'num_decks', 'num_players', 'blackjack_payout', 'dealer_stand', 'allow_double_down', 'penetration',
+    'num_shoes', 'num_rounds', 'house_edge', 'standard_error',
+    'difference', 'difference_error', 'independent_difference_error', 'mid_round_reshuffles')
+
+
+def rules_grid(base : Rules, **options) -> list:
+    '''
+    Every combination of options, each a list of values for a Rules field, applied to base.
+    e.g. rules_grid(rules, dealer_stand=list(DealerStand), blackjack_payout=[1.5, 1.2])
+    '''
+    names = list(options)
+    return [ dataclasses.replace(base, **dict(zip(names, values))) for values in itertools.product(*options.values()) ]
+
+
+def shard_sizes(num_shoes : int, num_shards : int) -> list:
+    '''
+    num_shoes split as evenly as possible into num_shards counts.
+    '''
+    return [ num_shoes // num_shards + (1 if i < num_shoes % num_shards else 0) for i in range(num_shards) ]
+
+
+def play_shoe(table : Table, on_round = None) -> int:
+    '''
+    Plays one whole shoe on table, from a fresh shuffle until the cut card comes out, calling on_round as Table.play_hands does.
+    Returns how many rounds ran the shoe dry and shuffled the discards back in part way through.
+    '''
+    shoe       = table.dealer.shoe
+    discarded  = 0 # The discard pile when the round started
+    reshuffles = 0
+
+    def settled(dealer) -> None:
+        nonlocal reshuffles
+        if discarded and not shoe.discarded: # Only a mid round reshuffle empties the discard pile before the table is cleared
+            reshuffles += 1
+        if on_round is not None:
+            on_round(dealer)
+
+    table.play_hands(1, settled)
+    while shoe.cursor: # The cursor goes back to the top when the cut card comes out and the shoe is shuffled
+        discarded = shoe.discarded
+        table.play_hands(1, settled)
+    return reshuffles
+
+
+def sweep(variants    : list,
+          num_shoes   : int,
+          seed        : int = 0,
+          num_workers : int = 1,
+          book_for    = None,
+          num_shards  : int = NUM_SHARDS) -> list:
+    '''
+    Plays num_shoes shoes of every variant in Rules list variants, all on the same shoes.
+    book_for, if given, maps Rules to the TheBook to play them with (e.g. strategy_generator.generated_book).
+    Returns one row per variant, a dict of SWEEP_FIELDS, with the edge difference measured against the first variant.
+    difference_error is nan for a variant whose shoes stopped lining up with the first's (see mid_round_reshuffles).
+    '''
+    shards = shard_sizes(num_shoes, num_shards)
+    seeds  = np.random.SeedSequence(seed).spawn(num_shards)
+    books  = [ book_for(rules) if book_for is not None else None for rules in variants ]
+    tasks  = [ (rules, count, shard_seed, book) for rules, book in zip(variants, books) for count, shard_seed in zip(shards, seeds) ]
+
+    if num_workers <= 1:
+        played = [ _play_shoes(*task) for task in tasks ]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            played = list(executor.map(_play_shoes, *zip(*tasks)))
+
+    # Each variant's per shoe nets and rounds, in the same shoe order for every variant.
+    #
+    nets       = [ np.concatenate([ net for net, _, _ in played[i:i + num_shards] ]) for i in range(0, len(played), num_shards) ]
+    rounds     = [ np.concatenate([ count for _, count, _ in played[i:i + num_shards] ]) for i in range(0, len(played), num_shards) ]
+    reshuffles = [ sum(count for _, _, count in played[i:i + num_shards]) for i in range(0, len(played), num_shards) ]
+
+    base_residuals = ratio_residuals(nets[0], rounds[0])
+    rows           = []
+    for rules, net, count, reshuffled in zip(variants, nets, rounds, reshuffles):
+        residuals = ratio_residuals(net, count)
+        edge      = net.sum() / count.sum()
+        paired    = not reshuffled and not reshuffles[0]
+        rows.append({
+            'num_decks'                    : rules.num_decks,
+            'num_players'                  : rules.num_players,
+            'blackjack_payout'             : rules.blackjack_payout,
+            'dealer_stand'                 : rules.dealer_stand.name,
+            'allow_double_down'            : rules.allow_double_down,
+            'penetration'                  : rules.penetration,
+            'num_shoes'                    : len(net),
+            'num_rounds'                   : int(count.sum()),
+            'house_edge'                   : -edge,
+            'standard_error'               : residual_standard_error(residuals),
+            'difference'                   : -edge - rows[0]['house_edge'] if rows else 0.0,
+            'difference_error'             : residual_standard_error(residuals - base_residuals) if paired else math.nan,
+            'independent_difference_error' : math.hypot(residual_standard_error(residuals), residual_standard_error(base_residuals)) if rows else 0.0,
+            'mid_round_reshuffles'         : reshuffled,
+        })
+    return rows
+
+
+def print_sweep(rows : list) -> None:
+    '''
+    Prints a sweep's results, edges and errors in percent.
+    '''
+    print(f'{"Decks":>5} {"Seats":>5} {"Payout":>6} {"Dealer":>20} {"Double":>6} {"Rounds":>10} {"House Edge":>16} {"vs First (CRN)":>18} {"Independent":>12}')
+    for row in rows:
+        print(f'{row["num_decks"]:>5} {row["num_players"]:>5} {row["blackjack_payout"]:>6} {row["dealer_stand"]:>20} {str(row["allow_double_down"]):>6} {row["num_rounds"]:>10}'
+              f' {row["house_edge"] * 100:>7.3f}% +/- {row["standard_error"] * 100:.3f}'
+              f' {row["difference"] * 100:>+8.3f}% +/- {row["difference_error"] * 100:.3f}'
+              f' {"+/- " + format(row["independent_difference_error"] * 100, ".3f"):>12}')
+    reshuffled = sum(row['mid_round_reshuffles'] for row in rows)
+    if reshuffled:
+        print(f'{reshuffled} rounds reshuffled mid round, so the shoes stopped lining up and the CRN errors affected are nan. Lower the penetration.')
+
+
+def write_sweep(rows : list, path : str) -> None:
+    '''
+    Writes a sweep's results as CSV, one row per variant.
+    '''
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, SWEEP_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _play_shoes(rules : Rules, num_shoes : int, seed : np.random.SeedSequence, book : TheBook) -> tuple:
+    '''
+    Worker entry point. Plays num_shoes whole shoes and returns each shoe's (net units, rounds) as two arrays,
+    and the number of mid round reshuffles.
+    '''
+    table      = Table(rules, seed, Verbosity.SILENT, book=book)
+    stats      = table.stats
+    nets       = np.zeros(num_shoes)
+    rounds     = np.zeros(num_shoes, dtype=np.int64)
+    reshuffles = 0
+    for i in range(num_shoes):
+        total, count = stats.total, stats.count
+        reshuffles  += play_shoe(table)
+        nets[i]      = stats.total - total
+        rounds[i]    = stats.count - count
+    return nets, rounds, reshuffles
+
+
+if __name__ == '__main__':
+    '''
+    The usual rule questions, on six deck shoes with one seat.
+    '''
+    import os
+
+    BASE     = Rules(6, 1, 0, 1.5, True, False, False, False, DealerStand.STAND_SOFT_SEVENTEEN, 0.8)
+    VARIANTS = rules_grid(BASE,
+                          blackjack_payout=[1.5, 1.2],
+                          dealer_stand=[DealerStand.STAND_SOFT_SEVENTEEN, DealerStand.HIT_SOFT_SEVENTEEN],
+                          allow_double_down=[True, False])
+    print_sweep(sweep(VARIANTS, num_shoes=2_000, seed=1, num_workers=os.cpu_count() or 1))
@@ -0,0 +1,49 @@
+from counting import HI_LO, HI_LO_DEVIATIONS, KO, MIN_INDEX, OMEGA_II, CountingStrategy, hard
+from main import NUM_RANKS, DealerStand, PlayerAction, Rules, TheBook
+
+
+'''
+Checks that the index plays switch on the right side of their published indices.
+'''
+
+# Published Hi-Lo indices for the plays that hit below them, by (state, face value). The index is where to stand.
+#
+STAND_INDICES = {
+    (hard(13), 2) : -1,
+    (hard(12), 4) :  0,
+    (hard(12), 5) : -2,
+    (hard(12), 6) : -1,
+    (hard(13), 3) : -2,
+}
+
+
+def make_books(strategy : CountingStrategy) -> list:
+    book = TheBook(Rules(6, 1, 0, 1.5, True, False, False, False, DealerStand.STAND_SOFT_SEVENTEEN))
+    return strategy.compile(book.book)
+
+
+def action_at(books : list, state : int, face_value : int, index : int) -> PlayerAction:
+    return books[index - MIN_INDEX][state * NUM_RANKS + face_value]
+
+
+def test_hi_lo_deviations_switch_at_published_indices():
+    books = make_books(CountingStrategy())
+    for deviation in HI_LO_DEVIATIONS:
+        state, face_value = deviation.state, deviation.face_value
+        if deviation.above:
+            assert action_at(books, state, face_value, deviation.index) is deviation.action
+            assert action_at(books, state, face_value, deviation.index - 1) is not deviation.action
+        else:
+            stand_index = STAND_INDICES[(state, face_value)]
+            assert action_at(books, state, face_value, stand_index) is PlayerAction.STAND
+            assert action_at(books, state, face_value, stand_index - 1) is PlayerAction.HIT
+    assert len(STAND_INDICES) == sum(not deviation.above for deviation in HI_LO_DEVIATIONS)
+
+
+def test_deviations_are_keyed_by_system():
+    assert CountingStrategy(HI_LO).deviations == HI_LO_DEVIATIONS
+    for system in (KO, OMEGA_II):
+        strategy = CountingStrategy(system)
+        assert strategy.deviations == ()
+        books    = make_books(strategy)
+        assert all(book == books[0] for book in books)
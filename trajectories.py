@@ -0,0 +1,175 @@
+import numpy as np
+
+
+'''
+On disk ragged arrays of session trajectories.
+
+A store is three raw files next to each other: path.values holds every session's values back to back,
+path.offsets holds where each session starts, with the total length last, so session i is
+values[offsets[i]:offsets[i + 1]], and path.numbers holds each session's number. Sessions are stored
+in whatever order they are written (the order they finish, for the vectorized engine), so the number
+is what ties the ith stored session back to the session it was in the run. Writers append whole batches of sessions at a time, and readers
+memory map both files, so any session or run of sessions loads as a view without copying the store.
+'''
+
+TRAJECTORY_DTYPE = np.dtype('<i8')
+OFFSET_DTYPE     = np.dtype('<i8')
+NUMBER_DTYPE     = np.dtype('<i8')
+
+
+class TrajectoryWriter:
+    '''
+    Appends sessions to a store, creating or truncating it on the first write.
+    '''
+    def __init__(self, path : str, dtype : np.dtype = TRAJECTORY_DTYPE) -> None:
+        self.path         = path
+        self.dtype        = dtype
+        self.values_file  = None
+        self.offsets_file = None
+        self.numbers_file = None
+        self.total        = 0
+        self.num_sessions = 0
+
+    def __enter__(self) -> 'TrajectoryWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def append(self, values : np.ndarray, number : int = None) -> None:
+        '''
+        Appends one session, numbered number (or the next number after the sessions written so far).
+        '''
+        self.append_many(np.asarray(values), np.array([ len(values) ]), None if number is None else np.array([ number ]))
+
+    def append_many(self, values : np.ndarray, lengths : np.ndarray, numbers : np.ndarray = None) -> None:
+        '''
+        Appends len(lengths) sessions stored back to back in values, numbered by numbers
+        (or numbered on from the sessions written so far).
+        '''
+        if self.values_file is None:
+            self.open()
+        if numbers is None:
+            numbers = self.num_sessions + 1 + np.arange(len(lengths))
+        np.asarray(values, dtype=self.dtype).tofile(self.values_file)
+        (self.total + np.cumsum(lengths, dtype=OFFSET_DTYPE)).astype(OFFSET_DTYPE).tofile(self.offsets_file)
+        np.asarray(numbers, dtype=NUMBER_DTYPE).tofile(self.numbers_file)
+        self.total        += int(np.sum(lengths))
+        self.num_sessions += len(lengths)
+
+    def open(self) -> None:
+        self.values_file  = open(f'{self.path}.values', 'wb')
+        self.offsets_file = open(f'{self.path}.offsets', 'wb')
+        self.numbers_file = open(f'{self.path}.numbers', 'wb')
+        np.zeros(1, dtype=OFFSET_DTYPE).tofile(self.offsets_file)
+
+    def position(self) -> tuple:
+        '''
+        Flushes what has been written and returns (values, sessions) written so far, to seek back to on resuming.
+        '''
+        if self.values_file is not None:
+            self.values_file.flush()
+            self.offsets_file.flush()
+            self.numbers_file.flush()
+        return self.total, self.num_sessions
+
+    def seek(self, position : tuple) -> None:
+        '''
+        Drops everything written after position (from position()) and carries on appending from there.
+        '''
+        self.close_files()
+        self.total, self.num_sessions = position
+        if self.num_sessions == 0:
+            self.open()
+            return
+        self.values_file  = open(f'{self.path}.values', 'r+b')
+        self.offsets_file = open(f'{self.path}.offsets', 'r+b')
+        self.numbers_file = open(f'{self.path}.numbers', 'r+b')
+        for file, size in ((self.values_file, self.total * self.dtype.itemsize),
+                           (self.offsets_file, (self.num_sessions + 1) * OFFSET_DTYPE.itemsize),
+                           (self.numbers_file, self.num_sessions * NUMBER_DTYPE.itemsize)):
+            file.truncate(size)
+            file.seek(size)
+
+    def close_files(self) -> None:
+        if self.values_file is not None:
+            self.values_file.close()
+            self.offsets_file.close()
+            self.numbers_file.close()
+            self.values_file  = None
+            self.offsets_file = None
+            self.numbers_file = None
+
+    def close(self) -> None:
+        if self.values_file is None:
+            self.open()
+        self.close_files()
+
+
+class TrajectoryStore:
+    '''
+    Read only, memory mapped view of a store written by TrajectoryWriter.
+    store[i] is the ith stored session as an array, and store[i:j] is a list of them, all views into the file.
+    '''
+    def __init__(self, path : str, dtype : np.dtype = TRAJECTORY_DTYPE) -> None:
+        self.path    = path
+        self.values  = _map(f'{path}.values', dtype)
+        self.offsets = _map(f'{path}.offsets', OFFSET_DTYPE)
+        self.numbers = _map(f'{path}.numbers', NUMBER_DTYPE) # The session number of each stored session
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ self[i] for i in range(*index.indices(len(self))) ]
+        if index < 0:
+            index += len(self)
+        return self.values[self.offsets[index]:self.offsets[index + 1]]
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def final_values(self) -> np.ndarray:
+        '''
+        The last value of every session.
+        '''
+        return self.values[self.offsets[1:] - 1]
+
+
+def _map(path : str, dtype : np.dtype) -> np.ndarray:
+    '''
+    Memory maps a raw file. numpy can't map an empty file, so those load as an empty array.
+    '''
+    with open(path, 'rb') as file:
+        if not file.seek(0, 2):
+            return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+def concat_ragged(first : np.ndarray, first_lengths : np.ndarray, second : np.ndarray, second_lengths : np.ndarray) -> tuple:
+    '''
+    Joins two ragged arrays with the same number of rows row by row, each row of first followed by the same row of second.
+    Returns (values, lengths).
+    '''
+    lengths = first_lengths + second_lengths
+    starts  = np.cumsum(lengths) - lengths
+    values  = np.empty(int(lengths.sum()), dtype=np.result_type(first, second))
+    values[_positions(starts, first_lengths)]                  = first
+    values[_positions(starts + first_lengths, second_lengths)] = second
+    return values, lengths
+
+
+def select_ragged(values : np.ndarray, lengths : np.ndarray, rows : np.ndarray) -> tuple:
+    '''
+    The rows of a ragged array picked by a boolean mask, as (values, lengths).
+    '''
+    return values[np.repeat(rows, lengths)], lengths[rows]
+
+
+def _positions(starts : np.ndarray, lengths : np.ndarray) -> np.ndarray:
+    '''
+    Indices starts[i], starts[i] + 1, ... starts[i] + lengths[i] - 1 for every row, back to back.
+    '''
+    ends = np.cumsum(lengths)
+    return np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - (ends - lengths), lengths)
@@ -0,0 +1,255 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from counting import HI_LO
+from dealer_probabilities import BLACKJACK, remove_card, shoe_composition
+from main import DECK_RANKS, HARD_VALUES, Deck, DealerStand, Rules, Table, TheBook, Verbosity
+from stats import ratio_residuals, residual_standard_error
+from strategy_generator import FaceSolver
+from sweep import play_shoe, shard_sizes
+
+
+'''
+Variance reduced house edge estimates.
+
+Antithetic shoes: every shoe is also played in reverse order on a second table. Play is counted a whole
+shoe at a time with sweep.play_shoe, and each shoe is paired with its reverse, so luck one way in a shoe is
+partly given back by the other.
+
+Control variates: each round records quantities whose expectation is known exactly, and the edge is
+corrected by how far they landed from it. Each is measured against the cards left in the shoe when
+the round starts, so its expectation is exactly zero whatever the cut card and the earlier rounds did.
+A round whose initial deal runs the shoe dry draws part of it from the shuffled discards, so its controls
+are left at zero (whether that happens is known before the deal, so zero is still their expectation):
+    - dealer blackjack, against the chance of an ace and a ten in two of the unseen cards
+    - the seats' naturals (averaged), against the same chance
+    - the Hi-Lo count of the initial deal, against what that many unseen cards average
+    - the seats' expected result given their first two cards and the dealer's face card (from the full
+      shoe strategy solver), against its average over every initial deal the unseen cards could make
+The correction's coefficients are the least squares fit of each round's net on the controls. The shards are
+cross fitted: each shard is corrected with coefficients fitted on every other shard, so a shoe's correction
+doesn't depend on its own luck and the standard errors don't have to allow for the fit.
+
+estimate_edge reports the plain estimate alongside each reduction, every one with a standard error
+that treats shoes (or pairs of shoes) as the independent samples.
+'''
+
+NUM_CONTROLS = 4
+NUM_SHARDS   = 16
+
+HI_LO_TAGS = np.array(HI_LO.tags)
+TENS       = np.array([ HARD_VALUES[rank] == 10 for rank in range(len(HARD_VALUES)) ])
+
+
+class ReversedDeck(Deck):
+    '''
+    A Deck dealing every shuffle back to front. Seeded like another Deck, it deals that deck's shoes reversed.
+    A shuffle permutes whatever order the cards are already in, so the forward order is kept and shuffled
+    exactly as the other Deck shuffles its cards, and only the copy dealt from is reversed.
+    '''
+    def __init__(self, num_decks = 0, rng : np.random.Generator = None, penetration : float = 1.0):
+        self.forward = np.tile(DECK_RANKS, num_decks)
+        super().__init__(num_decks, rng, penetration)
+
+    def shuffle(self) -> None:
+        self.rng.shuffle(self.forward)
+        self.cards[:]  = self.forward[::-1]
+        self.cursor    = 0
+        self.discarded = 0
+
+
+class ShoeResults:
+    '''
+    Per shoe totals from one table, and the per round sums the control variate fit needs.
+    '''
+    def __init__(self, num_shoes : int) -> None:
+        self.nets      = np.zeros(num_shoes)
+        self.rounds    = np.zeros(num_shoes, dtype=np.int64)
+        self.controls  = np.zeros((num_shoes, NUM_CONTROLS))   # Each shoe's sum of each control
+        self.cross     = np.zeros((NUM_CONTROLS, NUM_CONTROLS)) # Sum over rounds of controls x controls
+        self.covariant = np.zeros(NUM_CONTROLS)                 # Sum over rounds of controls x net
+
+    def concatenate(self, other : 'ShoeResults') -> 'ShoeResults':
+        joined           = ShoeResults(0)
+        joined.nets      = np.concatenate((self.nets, other.nets))
+        joined.rounds    = np.concatenate((self.rounds, other.rounds))
+        joined.controls  = np.concatenate((self.controls, other.controls))
+        joined.cross     = self.cross + other.cross
+        joined.covariant = self.covariant + other.covariant
+        return joined
+
+
+def initial_value_table(rules : Rules) -> np.ndarray:
+    '''
+    Expected result per unit bet of every initial deal off a full shoe, indexed by the player's
+    two card values and the dealer's face card value, each less one. Splits aren't considered,
+    which only makes the table a slightly weaker control.
+    '''
+    shoe  = shoe_composition(rules.num_decks)
+    table = np.zeros((10, 10, 10))
+    for face_value in range(1, 11):
+        solver = FaceSolver(rules, remove_card(shoe, face_value), face_value)
+        for first in range(1, 11):
+            for second in range(1, 11):
+                if sorted((first, second)) == [1, 10]:
+                    table[first - 1, second - 1, face_value - 1] = rules.blackjack_payout * (1 - solver.dealer[BLACKJACK])
+                else:
+                    table[first - 1, second - 1, face_value - 1] = solver.best(first + second, first == 1 or second == 1)[0]
+    return table
+
+
+def expected_value(table : np.ndarray, counts : np.ndarray) -> float:
+    '''
+    The mean of an initial_value_table over three different cards drawn from a shoe with counts of each value.
+    '''
+    same  = np.eye(10)
+    first = counts[:, None, None]
+    other = (counts[None, :] - same)[:, :, None]
+    face  = counts[None, None, :] - same[:, None, :] - same[None, :, :]
+    total = counts.sum()
+    return float((table * first * other * face).sum() / (total * (total - 1) * (total - 2)))
+
+
+def control_coefficients(results : ShoeResults) -> np.ndarray:
+    '''
+    Least squares coefficients of each round's net on its controls.
+    '''
+    count    = results.rounds.sum()
+    controls = results.controls.sum(axis=0) / count
+    net      = results.nets.sum() / count
+    cross    = results.cross - count * np.outer(controls, controls)
+    return np.linalg.lstsq(cross, results.covariant - count * controls * net, rcond=None)[0]
+
+
+def estimate_edge(rules       : Rules,
+                  num_shoes   : int,
+                  seed        : int = 0,
+                  book        : TheBook = None,
+                  num_workers : int = 1,
+                  num_shards  : int = NUM_SHARDS) -> dict:
+    '''
+    Plays num_shoes shoes forwards and the same shoes reversed, and returns
+    { estimator name : (house edge, standard error) } for the plain and variance reduced estimators.
+    The plain estimate uses the forward shoes only, so it shows what the same number of shoes gives without any reduction.
+    The control variate coefficients are cross fitted over the shards, so there must be at least two.
+    '''
+    assert num_shards > 1, 'Error: Cross fitting the control variates needs at least two shards.'
+    shards = shard_sizes(num_shoes, num_shards)
+    seeds  = np.random.SeedSequence(seed).spawn(num_shards)
+    tasks  = [ (rules, count, shard_seed, book, reverse) for reverse in (False, True) for count, shard_seed in zip(shards, seeds) ]
+
+    if num_workers <= 1:
+        played = [ _play_shoes(*task) for task in tasks ]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            played = list(executor.map(_play_shoes, *zip(*tasks)))
+
+    forward  = ShoeResults(0)
+    reverse  = ShoeResults(0)
+    for shard in played[:num_shards]:
+        forward = forward.concatenate(shard)
+    for shard in played[num_shards:]:
+        reverse = reverse.concatenate(shard)
+    both     = forward.concatenate(reverse)
+
+    # Each shoe's net with the controls taken out, by coefficients fitted over both tables' other shards.
+    #
+    forward_adjusted = []
+    reverse_adjusted = []
+    for i in range(num_shards):
+        others = ShoeResults(0)
+        for j in range(num_shards):
+            if j != i:
+                others = others.concatenate(played[j]).concatenate(played[num_shards + j])
+        coefficients = control_coefficients(others)
+        forward_adjusted.append(played[i].nets - played[i].controls @ coefficients)
+        reverse_adjusted.append(played[num_shards + i].nets - played[num_shards + i].controls @ coefficients)
+    forward_adjusted = np.concatenate(forward_adjusted)
+    reverse_adjusted = np.concatenate(reverse_adjusted)
+
+    def estimate(nets : np.ndarray, rounds : np.ndarray) -> tuple:
+        return -nets.sum() / rounds.sum(), residual_standard_error(ratio_residuals(nets, rounds))
+
+    paired_rounds = forward.rounds + reverse.rounds
+    return {
+        'plain'                        : estimate(forward.nets, forward.rounds),
+        'plain, both tables'           : estimate(both.nets, both.rounds),
+        'control variates'             : estimate(forward_adjusted, forward.rounds),
+        'antithetic'                   : estimate(forward.nets + reverse.nets, paired_rounds),
+        'antithetic + control variates': estimate(forward_adjusted + reverse_adjusted, paired_rounds),
+    }
+
+
+def print_estimates(estimates : dict) -> None:
+    for name, (edge, error) in estimates.items():
+        print(f'{name:<30} House Edge: {round(edge * 100, 3)}% +/- {round(error * 100, 3)}%')
+
+
+def _play_shoes(rules : Rules, num_shoes : int, seed : np.random.SeedSequence, book : TheBook, reverse : bool) -> ShoeResults:
+    '''
+    Worker entry point. Plays num_shoes whole shoes, reversed if reverse, recording each round's controls.
+    '''
+    table = Table(rules, seed, Verbosity.SILENT, book=book)
+    if reverse:
+        table.dealer.shoe = ReversedDeck(rules.num_decks, np.random.default_rng(table.seed), rules.penetration)
+    shoe      = table.dealer.shoe
+    stats     = table.stats
+    results   = ShoeResults(num_shoes)
+    num_dealt = 2 * (rules.num_players + 1)
+    seats     = rules.num_players
+    values    = np.array(HARD_VALUES)
+    initial_values = initial_value_table(rules)
+    last      = 0.0
+    size      = len(shoe.cards)
+    cursor    = 0 # Where the round started, as Dealer.reset_table leaves the shoe
+
+    def record(dealer) -> None:
+        nonlocal last, cursor
+        if shoe.discarded == cursor:
+            start  = cursor # The round's cards are the ones after the discard pile
+            unseen = shoe.cards[start:]
+        else:
+            start  = 0 # The shoe ran dry, so the cards unseen at the start of the round were all dealt and moved to the front
+            unseen = shoe.cards[:size - cursor]
+        total = len(unseen)
+
+        if total < num_dealt:
+            controls = np.zeros(NUM_CONTROLS) # The initial deal ran into the reshuffled discards
+        else:
+            aces             = np.count_nonzero(unseen == 1)
+            tens             = np.count_nonzero(TENS[unseen])
+            natural          = 2 * aces * tens / (total * (total - 1))
+            dealer_blackjack = dealer.hand.best_total() == 21 and len(dealer.hand.cards) == 2
+            naturals         = sum(not player.has_split and len(player.hands[0].cards) == 2 and player.hands[0].best_total() == 21 for player in dealer.players)
+            dealt            = values[shoe.cards[start:start + num_dealt]]
+            face             = dealt[0] - 1
+            initial_value    = sum(initial_values[dealt[1 + seat] - 1, dealt[seats + 2 + seat] - 1, face] for seat in range(seats))
+            controls         = np.array([
+                dealer_blackjack - natural,
+                naturals / len(dealer.players) - natural,
+                HI_LO_TAGS[shoe.cards[start:start + num_dealt]].sum() - num_dealt * HI_LO_TAGS[unseen].sum() / total,
+                initial_value / len(dealer.players) - expected_value(initial_values, np.bincount(values[unseen], minlength=11)[1:]),
+            ])
+
+        net    = stats.total - last
+        last   = stats.total
+        cursor = 0 if shoe.reached_cut_card() else shoe.cursor # Where the next round starts
+        results.nets[shoe_index]     += net
+        results.rounds[shoe_index]   += 1
+        results.controls[shoe_index] += controls
+        results.cross                += np.outer(controls, controls)
+        results.covariant            += controls * net
+
+    for shoe_index in range(num_shoes):
+        play_shoe(table, record)
+    return results
+
+
+if __name__ == '__main__':
+    '''
+    Compares the estimators on six deck shoes with one seat.
+    '''
+    import os
+
+    RULES = Rules(6, 1, 0, 1.5, True, False, False, False, DealerStand.STAND_SOFT_SEVENTEEN, 0.8)
+    print_estimates(estimate_edge(RULES, num_shoes=2_000, seed=1, num_workers=os.cpu_count() or 1))
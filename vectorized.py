@@ -0,0 +1,303 @@
+import numpy as np
+
+from main import (BASE_BET, DECK_RANKS, HARD_VALUES, HARD_STATE, NUM_RANKS, PAIR_STATE, SOFT_STATE,
+                  DealerStand, GameState, PlayerAction, Rules, TheBook, Verbosity)
+from stats import SimulationStats
+
+
+'''
+Lockstep vectorized blackjack.
+
+Plays thousands of independent tables at once, one table per lane.
+All of the state lives in NumPy arrays and each GameState step runs as masked
+array operations across every lane, using the same Rules and TheBook decisions
+as the Dealer/Player/Hand object model. Within a lane, cards are drawn in
+exactly the order the object model draws them, so the same shoe plays out the same way.
+'''
+
+HARD_VALUES_ARRAY = np.array(HARD_VALUES, dtype=np.int16)
+
+HIT         = PlayerAction.HIT.value
+STAND       = PlayerAction.STAND.value
+DOUBLE_DOWN = PlayerAction.DOUBLE_DOWN.value
+SPLIT       = PlayerAction.SPLIT.value
+
+
+def book_codes(book : TheBook) -> np.ndarray:
+    '''
+    The compiled book as a read-only array of PlayerAction values.
+    '''
+    codes = np.array([ action.value for action in book.book ], dtype=np.uint8)
+    codes.flags.writeable = False
+    return codes
+
+
+class Hands:
+    '''
+    One hand per lane, as arrays.
+    The totals follow the same rules as Hand: soft_total counts one ace as 11 when that doesn't bust.
+    '''
+    def __init__(self, num_lanes : int) -> None:
+        self.hard      = np.zeros(num_lanes, dtype=np.int16)
+        self.has_ace   = np.zeros(num_lanes, dtype=bool)
+        self.num_cards = np.zeros(num_lanes, dtype=np.int16)
+        self.first     = np.zeros(num_lanes, dtype=np.uint8) # First card, for pairs and splits
+        self.is_pair   = np.zeros(num_lanes, dtype=bool)
+        self.bet       = np.zeros(num_lanes, dtype=np.int32)
+
+    def reset(self) -> None:
+        self.hard.fill(0)
+        self.has_ace.fill(False)
+        self.num_cards.fill(0)
+        self.first.fill(0)
+        self.is_pair.fill(False)
+        self.bet.fill(BASE_BET)
+
+    def add_cards(self, lanes : np.ndarray, cards : np.ndarray) -> None:
+        '''
+        Adds one card to the hand in each of the given lanes.
+        '''
+        num_cards = self.num_cards[lanes]
+        self.hard[lanes]     += HARD_VALUES_ARRAY[cards]
+        self.has_ace[lanes]  |= cards == 1
+        self.first[lanes]     = np.where(num_cards == 0, cards, self.first[lanes])
+        self.is_pair[lanes]   = (num_cards == 1) & (self.first[lanes] == cards)
+        self.num_cards[lanes] = num_cards + 1
+
+    def soft_totals(self, lanes : np.ndarray = None) -> np.ndarray:
+        hard    = self.hard    if lanes is None else self.hard[lanes]
+        has_ace = self.has_ace if lanes is None else self.has_ace[lanes]
+        return np.where(has_ace & (hard <= 11), hard + 10, hard)
+
+    def best_totals(self) -> np.ndarray:
+        '''
+        Like Hand.best_total, 0 for a bust hand.
+        '''
+        return np.where(self.hard > 21, 0, self.soft_totals())
+
+
+class VectorizedTables:
+    '''
+    num_tables independent blackjack tables played in lockstep.
+    Each call to play_round plays one hand at every table.
+    '''
+    def __init__(self, rules : Rules, num_tables : int = 4096, seed : int | np.random.SeedSequence = None, book : TheBook = None) -> None:
+        '''
+        Constructor.
+        '''
+        self.rules      = rules
+        self.num_tables = num_tables
+        self.rng        = np.random.default_rng(seed)
+        self.codes      = book_codes(book if book is not None else TheBook(rules))
+        self.hit_soft   = rules.dealer_stand is DealerStand.HIT_SOFT_SEVENTEEN
+        self.stats      = SimulationStats()
+
+        # Shoes, one row per lane
+        self.shoe_size = rules.num_decks * len(DECK_RANKS)
+        self.shoes     = self.rng.permuted(np.tile(np.tile(DECK_RANKS, rules.num_decks), (num_tables, 1)), axis=1)
+        self.cut_card  = int(self.shoe_size * rules.penetration)
+        self.cursor    = np.zeros(num_tables, dtype=np.int64)
+        self.discarded = np.zeros(num_tables, dtype=np.int64) # Per lane discard pile boundary, as in Deck
+
+        # Hands. Each seat has room for one split.
+        self.dealer    = Hands(num_tables)
+        self.hands     = [ (Hands(num_tables), Hands(num_tables)) for _ in range(rules.num_players) ]
+        self.has_split = np.zeros((rules.num_players, num_tables), dtype=bool)
+        self.all_lanes = np.arange(num_tables)
+
+    def draw(self, lanes : np.ndarray) -> np.ndarray:
+        '''
+        Draws one card in each of the given lanes, like Deck.draw_card.
+        '''
+        cursor = self.cursor[lanes]
+        empty  = cursor == self.shoe_size
+        if empty.any():
+            for lane in lanes[empty]:
+                self.reshuffle_discards(lane)
+            cursor = self.cursor[lanes]
+        self.cursor[lanes] = cursor + 1
+        return self.shoes[lanes, cursor]
+
+    def reshuffle_discards(self, lane : int) -> None:
+        '''
+        Deck.reshuffle_discards for one lane. Only happens when a shoe runs dry mid round.
+        '''
+        shoe      = self.shoes[lane]
+        discarded = self.discarded[lane]
+        assert discarded > 0, 'Error: The shoe and discard pile are both empty.'
+        in_play = shoe[discarded:].copy()
+        shoe[len(in_play):] = shoe[:discarded]
+        shoe[:len(in_play)] = in_play
+        self.rng.shuffle(shoe[len(in_play):])
+        self.cursor[lane]    = len(in_play)
+        self.discarded[lane] = 0
+
+    def deal(self, hands : Hands, lanes : np.ndarray) -> None:
+        hands.add_cards(lanes, self.draw(lanes))
+
+    def play_rounds(self, num_rounds : int) -> None:
+        '''
+        Plays num_rounds hands at every table.
+        '''
+        for _ in range(num_rounds):
+            self.play_round()
+
+    def run_simulations(self, num_hands : int = None, verbosity : Verbosity = Verbosity.SUMMARY) -> None:
+        '''
+        Plays at least num_hands hands in total (rules.num_simulations by default), spread across the tables.
+        '''
+        num_hands = num_hands if num_hands is not None else self.rules.num_simulations
+        self.play_rounds(-(-num_hands // self.num_tables))
+        if verbosity is not Verbosity.SILENT:
+            print(f'Ran {self.stats.count} BlackJack Simulations on {self.num_tables} tables.')
+            print(f'Number of hands played: {self.stats.num_hands}')
+            print(f'Number of hands won: {self.stats.num_wins}')
+            print(f'Win Percentage: %{self.stats.win_percentage()}')
+            print(self.stats.house_edge_str())
+
+    def play_round(self) -> None:
+        '''
+        Runs the GameState flow once across all lanes.
+        '''
+        game_state = GameState.INITIAL_DEAL
+        while game_state is not GameState.NOT_PLAYING:
+            match game_state:
+                case GameState.INITIAL_DEAL:     game_state = self.initial_deal()
+                case GameState.PLAYER_ACTION:    game_state = self.player_action()
+                case GameState.DEALER_ACTION:    game_state = self.dealer_action()
+                case GameState.CHECK_GAME_STATE: game_state = self.check_game_state()
+
+    def initial_deal(self) -> GameState:
+        '''
+        Discards the last round, reshuffles the shoes whose cut card has come out,
+        then resets every hand and deals two cards to the dealer and each seat, in seat order.
+        '''
+        self.discarded[:] = self.cursor
+        cut = np.flatnonzero(self.cursor >= self.cut_card)
+        if len(cut):
+            self.shoes[cut]     = self.rng.permuted(self.shoes[cut], axis=1)
+            self.cursor[cut]    = 0
+            self.discarded[cut] = 0
+
+        self.dealer.reset()
+        for hand, split_hand in self.hands:
+            hand.reset()
+            split_hand.reset()
+        self.has_split.fill(False)
+
+        for _ in range(2):
+            self.deal(self.dealer, self.all_lanes)
+            for hand, _ in self.hands:
+                self.deal(hand, self.all_lanes)
+
+        return GameState.PLAYER_ACTION
+
+    def player_action(self) -> GameState:
+        '''
+        Plays each seat in turn, its first hand and then its split hand, across all lanes.
+        '''
+        face_card = self.dealer.first
+        for seat, (hand, split_hand) in enumerate(self.hands):
+            self.play_hand(seat, hand, split_hand, self.all_lanes, face_card)
+            split_lanes = np.flatnonzero(self.has_split[seat])
+            if len(split_lanes):
+                self.play_hand(seat, split_hand, None, split_lanes, face_card)
+
+        return GameState.DEALER_ACTION
+
+    def play_hand(self, seat : int, hand : Hands, split_hand : Hands, lanes : np.ndarray, face_card : np.ndarray) -> None:
+        '''
+        Looks up and performs book moves in the given lanes until every hand has stood or bust.
+        '''
+        has_split = self.has_split[seat]
+        while len(lanes):
+            lanes = lanes[hand.hard[lanes] <= 21]
+            if not len(lanes):
+                break
+
+            hard  = hand.hard[lanes]
+            soft  = hand.soft_totals(lanes)
+            state = np.where(soft != hard, SOFT_STATE + soft, HARD_STATE + hard)
+            pairs = hand.is_pair[lanes] & ~has_split[lanes]
+            state = np.where(pairs, PAIR_STATE + HARD_VALUES_ARRAY[hand.first[lanes]], state)
+            action = self.codes[state * NUM_RANKS + face_card[lanes]]
+
+            if split_hand is not None:
+                splitting = lanes[action == SPLIT]
+                if len(splitting):
+                    self.split(seat, hand, split_hand, splitting)
+
+            if self.rules.allow_double_down:
+                doubling = lanes[action == DOUBLE_DOWN]
+                self.deal(hand, doubling)
+                hand.bet[doubling] *= 2
+                hitting = lanes[action == HIT]
+            else:
+                hitting = lanes[(action == HIT) | (action == DOUBLE_DOWN)]
+            self.deal(hand, hitting)
+
+            lanes = lanes[(action == HIT) | (action == SPLIT) | ((action == DOUBLE_DOWN) & (not self.rules.allow_double_down))]
+
+    def split(self, seat : int, hand : Hands, split_hand : Hands, lanes : np.ndarray) -> None:
+        '''
+        Splits the pair in the given lanes and deals the second card to each half, first hand first.
+        '''
+        card = hand.first[lanes]
+        self.has_split[seat, lanes] = True
+        for half in (hand, split_hand):
+            half.hard[lanes]      = 0
+            half.has_ace[lanes]   = False
+            half.num_cards[lanes] = 0
+            half.is_pair[lanes]   = False
+            half.add_cards(lanes, card)
+            self.deal(half, lanes)
+
+    def dealer_action(self) -> GameState:
+        '''
+        Hits every dealer hand that the house rules say to hit, until none are left.
+        '''
+        dealer = self.dealer
+        lanes  = self.all_lanes
+        while len(lanes):
+            hard = dealer.hard[lanes]
+            soft = dealer.soft_totals(lanes)
+            hit  = soft < 17
+            if self.hit_soft:
+                hit |= (soft == 17) & (hard < 17)
+            lanes = lanes[hit]
+            self.deal(dealer, lanes)
+
+        return GameState.CHECK_GAME_STATE
+
+    def check_game_state(self) -> GameState:
+        '''
+        Settles every hand the same way as Player.won_or_lost and adds each lane's round to the stats.
+        '''
+        stats            = self.stats
+        dealer_total     = self.dealer.best_totals()
+        dealer_blackjack = (dealer_total == 21) & (self.dealer.num_cards == 2)
+        payout           = self.rules.blackjack_payout
+        round_net        = np.zeros(self.num_tables)
+
+        for seat, hands in enumerate(self.hands):
+            has_split = self.has_split[seat]
+            for i, hand in enumerate(hands):
+                in_play   = has_split if i == 1 else np.ones(self.num_tables, dtype=bool)
+                total     = hand.best_totals()
+                blackjack = (total == 21) & (hand.num_cards == 2) & ~has_split
+                won_blackjack = blackjack & ~dealer_blackjack
+                lost     = (total == 0) | (dealer_blackjack & ~blackjack) | (total < dealer_total)
+                lost    &= ~won_blackjack
+                pushed   = ~lost & ~won_blackjack & (total == dealer_total)
+                won      = ~lost & ~won_blackjack & ~pushed
+
+                net = np.where(won_blackjack, payout, np.where(won, 1.0, np.where(lost, -1.0, 0.0))) * hand.bet
+                round_net += np.where(in_play, net, 0.0)
+
+                stats.num_hands      += int(in_play.sum())
+                stats.num_wins       += int((in_play & (won | won_blackjack)).sum())
+                stats.num_pushes     += int((in_play & pushed).sum())
+                stats.num_blackjacks += int((in_play & won_blackjack).sum())
+
+        stats.add_array(round_net / (BASE_BET * len(self.hands)))
+        return GameState.NOT_PLAYING